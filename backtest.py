@@ -0,0 +1,116 @@
+import argparse
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from joblib import Parallel, delayed
+from features import FEATURE_COLUMNS
+from model_registry import load_predictor
+from signals import predict_signals
+from train import TARGET_COLUMN, base_params, load_training_data, saved_params
+
+
+def walk_forward_folds(dates, initial_train_periods=8, freq=pd.offsets.QuarterEnd()):
+    """
+    Builds expanding-window folds over the calendar: each fold trains on every date before its test period and
+    tests on the next period (a quarter by default). The first initial_train_periods periods are only used for
+    training. Returns a list of (test_start, test_end) timestamps, end exclusive.
+    """
+    dates = pd.to_datetime(pd.Series(dates))
+    period_ends = pd.date_range(dates.min(), dates.max() + pd.offsets.Day(1), freq=freq)
+    boundaries = [dates.min()] + [end + pd.Timedelta(days=1) for end in period_ends]
+    if boundaries[-1] <= dates.max():
+        boundaries.append(dates.max() + pd.Timedelta(days=1))
+    return list(zip(boundaries[initial_train_periods:-1], boundaries[initial_train_periods + 1:]))
+
+
+def run_fold(data, test_start, test_end, model=None, params=None, num_rounds=100):
+    """
+    Scores one fold. With `model` the same model is reused for every fold; otherwise a booster is retrained on the
+    rows whose label is known before test_start: a row's label is the move to the ticker's next close, so rows
+    whose next trading day (`next_date`) falls in the test period are purged. Test rows are scored in one batch call.
+    """
+    test_df = data[(data["date"] >= test_start) & (data["date"] < test_end)]
+    if test_df.empty:
+        return None
+    if model is None:
+        train_df = data[data["next_date"] < test_start]  # Also drops each ticker's last row (no next day)
+        fold_params = dict(base_params(train_df[TARGET_COLUMN]), **(params or {}))
+        dtrain = xgb.DMatrix(train_df[FEATURE_COLUMNS], label=train_df[TARGET_COLUMN])
+        model = xgb.train(fold_params, dtrain, num_boost_round=num_rounds)
+    signals_df = predict_signals(model, test_df)
+    signals_df["fold_start"] = test_start
+    return signals_df
+
+
+def strategy_report(signals_df, threshold=0.5, allow_short=False):
+    """
+    Summarizes walk-forward predictions per ticker: hit rate of the direction call, cumulative strategy return
+    (long on Buy, short or flat on Sell) and buy-and-hold return over the same days.
+    """
+    df = signals_df.dropna(subset=["next_close"])
+    daily_return = df["next_close"] / df["close"] - 1
+    buy = df["probability"] > threshold
+    position = np.where(buy, 1.0, -1.0 if allow_short else 0.0)
+    strategy_return = position * daily_return
+
+    grouped = pd.DataFrame({
+        "ticker": df["ticker"],
+        "hit": buy == (df["next_close"] > df["close"]),
+        "strategy": np.log1p(strategy_return),
+        "buy_and_hold": np.log1p(daily_return),
+    }).groupby("ticker")
+    report = pd.DataFrame({
+        "observations": grouped.size(),
+        "accuracy": grouped["hit"].mean(),
+        "strategy_return": np.expm1(grouped["strategy"].sum()),
+        "buy_and_hold_return": np.expm1(grouped["buy_and_hold"].sum()),
+    })
+    return report.reset_index()
+
+
+def walk_forward_backtest(data, model=None, params=None, num_rounds=100, initial_train_periods=8,
+                          freq=pd.offsets.QuarterEnd(), n_jobs=-1, allow_short=False):
+    """
+    Runs the walk-forward backtest over every fold in parallel and returns (signals_df, report_df).
+    Pass a loaded model to reuse it, or leave it out to retrain on the expanding window for every fold.
+    """
+    data = data.sort_values(by=["ticker", "date"]).reset_index(drop=True)
+    if "next_close" not in data.columns:
+        data["next_close"] = data.groupby("ticker")["close"].shift(-1)
+    data["next_date"] = data.groupby("ticker")["date"].shift(-1)
+    folds = walk_forward_folds(data["date"], initial_train_periods, freq)
+
+    results = Parallel(n_jobs=n_jobs, prefer="threads")(
+        delayed(run_fold)(data, start, end, model, params, num_rounds) for start, end in folds
+    )
+    results = [result for result in results if result is not None]
+    if not results:
+        raise ValueError("Not enough history for a single walk-forward fold")
+    signals_df = pd.concat(results, ignore_index=True)
+    return signals_df, strategy_report(signals_df, allow_short=allow_short)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the Mag 7 signal.")
+    parser.add_argument("--data", default="mag7_processed_final3.csv", help="Processed dataset written by kpi2.ipynb")
+    parser.add_argument("--model", default=None, help="Reuse this saved model instead of retraining every fold")
+    parser.add_argument("--params-from", default="mag7_final_model.json",
+                        help="Saved model whose training parameters are used when retraining")
+    parser.add_argument("--rounds", type=int, default=None,
+                        help="Boosting rounds when retraining (defaults to the saved model's)")
+    parser.add_argument("--initial-periods", type=int, default=8, help="Quarters used only for the first training window")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel workers (-1 uses every core)")
+    parser.add_argument("--short", action="store_true", help="Go short on Sell signals instead of staying flat")
+    args = parser.parse_args()
+
+    model = load_predictor(args.model) if args.model else None
+    params, num_rounds = saved_params(args.params_from)
+    _, report = walk_forward_backtest(
+        load_training_data(args.data), model=model, params=params, num_rounds=args.rounds or num_rounds,
+        initial_train_periods=args.initial_periods, n_jobs=args.jobs, allow_short=args.short,
+    )
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
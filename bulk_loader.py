@@ -0,0 +1,32 @@
+import zipfile
+import pandas as pd
+
+
+def stream_member(zip_path, member, tickers=None, columns=None, chunksize=200_000, delimiter=';'):
+    """
+    Streams one CSV member of a bulk SimFin ZIP in chunks of `chunksize` rows.
+    Only `columns` are parsed and only rows whose Ticker is in `tickers` are yielded, so peak memory depends on
+    the chunk size, not on the size of the file.
+    """
+    usecols = None
+    if columns is not None:
+        usecols = list(columns) if tickers is None or 'Ticker' in columns else ['Ticker'] + list(columns)
+    tickers = set(tickers) if tickers is not None else None
+
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        with zip_ref.open(member) as file:
+            for chunk in pd.read_csv(file, delimiter=delimiter, header=0, usecols=usecols, chunksize=chunksize):
+                if tickers is not None:
+                    chunk = chunk[chunk['Ticker'].isin(tickers)]
+                if columns is not None:
+                    chunk = chunk[list(columns)]
+                if not chunk.empty:
+                    yield chunk
+
+
+def load_member(zip_path, member, tickers=None, columns=None, chunksize=200_000, delimiter=';'):
+    """Returns the matching rows of one ZIP member as a single DataFrame, built from the streamed chunks."""
+    chunks = list(stream_member(zip_path, member, tickers, columns, chunksize, delimiter))
+    if not chunks:
+        return pd.DataFrame(columns=list(columns) if columns is not None else None)
+    return pd.concat(chunks, ignore_index=True)
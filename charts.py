@@ -0,0 +1,130 @@
+import io
+import numpy as np
+from features import frame_fingerprint
+from frame_cache import FrameCache
+
+# Rendered chart images, keyed by chart kind, ticker and a hash of the plotted data
+CHART_CACHE = FrameCache(max_bytes=32 * 1024 * 1024)
+
+
+def data_version(df, columns=("date", "close")):
+    """Returns a content hash of the plotted columns; it changes only when the data behind a chart changes."""
+    return frame_fingerprint(df[list(columns)])
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: returns the positions of n_out points that keep the visual shape of (x, y).
+    The first and last points are always kept; every bucket in between contributes the point forming the largest
+    triangle with the previously kept point and the average of the next bucket. Bucket averages come from prefix
+    sums, so each bucket costs one vectorized area computation.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets between first and last point
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+            avg_x = (cum_x[next_end] - cum_x[next_start]) / (next_end - next_start)
+            avg_y = (cum_y[next_end] - cum_y[next_start]) / (next_end - next_start)
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max bucketing: splits the series into n_out // 2 equal buckets and keeps the lowest and highest point of
+    each, so every peak and trough survives. Returns the kept positions in order.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    buckets = np.arange(n) * (n_out // 2) // n
+    order = np.lexsort((y, buckets))  # Sorted by bucket, then value
+    starts = np.flatnonzero(np.r_[True, buckets[order][1:] != buckets[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate((order[starts], order[ends])))
+
+
+DOWNSAMPLERS = {"lttb", "minmax"}
+
+
+def downsample(df, max_points=500, method="lttb", x_col="date", y_col="close"):
+    """Returns at most max_points rows of df chosen by LTTB or min/max bucketing over (x_col, y_col)."""
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method {method!r}, expected one of {sorted(DOWNSAMPLERS)}")
+    if len(df) <= max_points:
+        return df
+    if method == "minmax":
+        return df.iloc[minmax_indices(df[y_col].to_numpy(), max_points)]
+    x = df[x_col].to_numpy()
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = (x - x[0]).astype("timedelta64[s]").astype(np.float64)  # Seconds from the first point
+    return df.iloc[lttb_indices(x, df[y_col].to_numpy(), max_points)]
+
+
+def downsampled_prices(df, ticker, max_points=500, method="lttb"):
+    """
+    Returns the date/close rows of a ticker downsampled to max_points, cached per ticker, date window, method and
+    data version so reruns reuse the result.
+    """
+    df = df[["date", "close"]]
+    window = (str(df["date"].min()), str(df["date"].max())) if not df.empty else None
+    key = ("series", ticker, window, max_points, method, data_version(df))
+    return CHART_CACHE.get_or_load(key, lambda: downsample(df, max_points, method).reset_index(drop=True))
+
+
+def render_price_chart(df, ticker, dpi=100):
+    """
+    Draws the closing price line of a ticker and returns it as PNG bytes.
+    The figure is built with the object-oriented API instead of pyplot, so it is never registered in pyplot's
+    global figure list and is freed as soon as the bytes are written.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 5), dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(df["date"], df["close"], label="Closing Price", color="blue")
+    ax.set_xlabel("Date")
+    ax.set_ylabel("Closing Price (USD)")
+    ax.set_title(f"{ticker} Closing Price Over the Last Year")
+    ax.legend()
+    fig.autofmt_xdate()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def price_chart_png(df, ticker, max_points=1000):
+    """
+    Returns the rendered price chart of a ticker, drawing it only when its data version is not cached yet.
+    Long histories are reduced to max_points with LTTB first (about one point per pixel of the 1000 px figure).
+    """
+    key = ("price", ticker, max_points, data_version(df))
+    return CHART_CACHE.get_or_load(key, lambda: render_price_chart(downsampled_prices(df, ticker, max_points), ticker))
+
+
+def price_chart_series(df, ticker, max_points=500, method="lttb"):
+    """Returns a date-indexed close series with at most max_points rows, ready for a client-side line chart."""
+    return downsampled_prices(df, ticker, max_points, method).set_index("date")["close"]
@@ -0,0 +1,118 @@
+import os
+import shutil
+import pandas as pd
+from bulk_loader import stream_member
+
+# Bulk SimFin files -> (dataset name, date column used for the year partition)
+BULK_DATASETS = {
+    'us-shareprices-daily.csv': ('shareprices_daily', 'Date'),
+    'us-income-quarterly.csv': ('income_quarterly', 'Report Date'),
+    'us-balance-quarterly.csv': ('balance_quarterly', 'Report Date'),
+}
+DEFAULT_LAKE_DIR = 'data/lake'
+
+# Text columns of the bulk files; other '... Date' columns are kept as text too, everything else is numeric
+TEXT_COLUMNS = {'Ticker', 'Currency', 'Fiscal Period'}
+
+
+def _require_pyarrow():
+    """Imports pyarrow, raising a readable error if the optional dependency is missing."""
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("The Parquet data lake needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _lake_schema(pa, columns, date_column):
+    """
+    Returns the fixed Arrow schema of a dataset: timestamps for the partition date, int32 for year, strings for
+    text columns and float64 for the rest, whatever dtypes pandas inferred for a given chunk.
+    """
+    fields = []
+    for name in columns:
+        if name == date_column:
+            fields.append(pa.field(name, pa.timestamp('ns')))
+        elif name == 'year':
+            fields.append(pa.field(name, pa.int32()))
+        elif name in TEXT_COLUMNS or name.endswith('Date'):
+            fields.append(pa.field(name, pa.string()))
+        else:
+            fields.append(pa.field(name, pa.float64()))
+    return pa.schema(fields)
+
+
+def ingest_bulk_zip(zip_path, lake_dir=DEFAULT_LAKE_DIR, members=None, chunksize=500_000):
+    """
+    Converts the bulk SimFin CSV files inside zip_path into Parquet datasets partitioned by Ticker and year.
+    Each member is read in chunks of `chunksize` rows, so the whole US market file never has to fit in memory.
+    Every chunk is cast to one schema (see _lake_schema), so all fragments of a dataset agree. Existing datasets with the same name are replaced. Returns the list of dataset directories written.
+    """
+    pa = _require_pyarrow()
+    members = members or list(BULK_DATASETS)
+    written = []
+    for member in members:
+        name, date_column = BULK_DATASETS[member]
+        target = os.path.join(lake_dir, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+
+        schema = None
+        for chunk_number, chunk in enumerate(stream_member(zip_path, member, chunksize=chunksize)):
+            chunk[date_column] = pd.to_datetime(chunk[date_column], errors='coerce')
+            chunk = chunk.dropna(subset=['Ticker', date_column])
+            chunk['year'] = chunk[date_column].dt.year.astype('int32')
+            schema = schema or _lake_schema(pa, chunk.columns, date_column)
+            table = pa.Table.from_pandas(chunk, preserve_index=False).select(schema.names).cast(schema)
+            pa.dataset.write_dataset(
+                table,
+                target,
+                format='parquet',
+                partitioning=['Ticker', 'year'],
+                partitioning_flavor='hive',
+                basename_template=f'part-{chunk_number}-{{i}}.parquet',
+                existing_data_behavior='overwrite_or_ignore',
+                max_partitions=1_000_000,  # One partition per ticker and year of the whole market
+            )
+        written.append(target)
+    return written
+
+
+def read_dataset(name, tickers=None, columns=None, start=None, end=None, lake_dir=DEFAULT_LAKE_DIR):
+    """
+    Reads a dataset from the lake with column projection and predicate pushdown.
+    Only the Ticker/year partitions that can match `tickers` and the [start, end] date range are opened, and only
+    the requested `columns` are decoded. Returns a pandas DataFrame.
+    """
+    pa = _require_pyarrow()
+    ds = pa.dataset
+    date_column = {dataset: column for dataset, column in BULK_DATASETS.values()}[name]
+    dataset = ds.dataset(os.path.join(lake_dir, name), format='parquet', partitioning='hive')
+    date_type = dataset.schema.field(date_column).type
+
+    conditions = []
+    if tickers is not None:
+        conditions.append(ds.field('Ticker').isin(sorted(tickers)))
+    if start is not None:
+        start = pd.Timestamp(start)
+        conditions.append(ds.field('year') >= start.year)
+        conditions.append(ds.field(date_column) >= pa.scalar(start.to_pydatetime(), type=date_type))
+    if end is not None:
+        end = pd.Timestamp(end)
+        conditions.append(ds.field('year') <= end.year)
+        conditions.append(ds.field(date_column) <= pa.scalar(end.to_pydatetime(), type=date_type))
+
+    row_filter = None
+    for condition in conditions:
+        row_filter = condition if row_filter is None else row_filter & condition
+
+    table = dataset.to_table(columns=columns, filter=row_filter)
+    return table.to_pandas()
+
+
+def lake_exists(lake_dir=DEFAULT_LAKE_DIR, members=None):
+    """Returns True if every requested bulk file has already been ingested into the lake."""
+    members = members or list(BULK_DATASETS)
+    return all(os.path.isdir(os.path.join(lake_dir, BULK_DATASETS[member][0])) for member in members)
@@ -0,0 +1,190 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from frame_cache import FrameCache
+from indicators import add_indicators
+
+FEATURE_COLUMNS = ["close", "p_e_ratio", "sma_50"]
+
+# Memoized results of build_features, keyed by a hash of the input frames and parameters
+FEATURE_CACHE = FrameCache(max_bytes=128 * 1024 * 1024)
+
+# Storage schema of compacted frames. Columns outside it are dropped; 'date' is stored as int32 days since
+# 1970-01-01 in a 'day' column. float32 is enough for prices and ratios: the model scores in float32 anyway, and
+# the values are computed in float64 first and only narrowed at the end.
+COMPACT_SCHEMA = {
+    "ticker": "category",
+    "date": "int32",
+    "close": "float32",
+    "net_income": "float32",
+    "shares_outstanding": "float32",
+    "market_capitalization": "float32",
+    "p_e_ratio": "float32",
+    "sma_50": "float32",
+    "next_close": "float32",
+    "probability": "float32",
+    "signal": "category",
+}
+
+# Columns of each fundamentals source that the features are built from; the rest is pruned before the join
+FEATURE_INPUTS = {
+    "income": ["net_income"],
+    "balance_sheet": [],
+    "shares_outstanding": ["shares_outstanding"],
+}
+
+
+def frame_fingerprint(df):
+    """Returns a content hash of a DataFrame (values, index and column names)."""
+    digest = hashlib.sha256()
+    digest.update(repr(list(df.columns)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _day_numbers(dates):
+    """Returns dates as int64 day numbers (days since 1970-01-01)."""
+    return pd.to_datetime(dates).to_numpy().astype("datetime64[D]").astype(np.int64)
+
+
+def _asof_indexer(left_codes, left_days, right_codes, right_days):
+    """
+    For every left row, returns the position of the latest right row with the same code and a day <= the left
+    day, or -1 when there is none. Both sides are searched as sorted (code, day) keys, so no frames are built.
+    """
+    order = np.lexsort((right_days, right_codes))
+    order = order[right_codes[order] >= 0]  # Drop tickers that have no prices
+    if len(order) == 0:  # Empty source, or none of its tickers is priced: every left row stays unmatched
+        return np.full(len(left_codes), -1, dtype=np.int64)
+    # Pack (code, day) into one sortable int64; day numbers are shifted so they are never negative
+    base = min(left_days.min(initial=0), right_days.min(initial=0))
+    right_keys = (right_codes[order].astype(np.int64) << 32) | (right_days[order] - base)
+    left_keys = (left_codes.astype(np.int64) << 32) | (left_days - base)
+
+    positions = np.searchsorted(right_keys, left_keys, side="right") - 1
+    found = positions >= 0
+    found[found] = right_codes[order[positions[found]]] == left_codes[found]
+    return np.where(found, order[np.maximum(positions, 0)], -1)
+
+
+def asof_join(share_prices_df, *fundamental_dfs):
+    """
+    Point-in-time join: attaches to every price row the latest fundamentals row of the same ticker dated on or
+    before it. Every fundamental column is gathered straight into the result, which is sorted by ticker and date;
+    values never cross from one ticker to another and rows before a ticker's first report stay NaN.
+    """
+    tickers = pd.Categorical(share_prices_df["ticker"])
+    codes = tickers.codes
+    days = _day_numbers(share_prices_df["date"])
+    order = np.lexsort((days, codes))
+
+    columns = {name: share_prices_df[name].to_numpy()[order] for name in share_prices_df.columns}
+    columns["date"] = pd.to_datetime(share_prices_df["date"]).to_numpy()[order]
+    for fundamental_df in fundamental_dfs:
+        indexer = _asof_indexer(
+            codes[order],
+            days[order],
+            tickers.categories.get_indexer(fundamental_df["ticker"]),  # -1 for tickers without prices
+            _day_numbers(fundamental_df["date"]),
+        )
+        for name in fundamental_df.columns.drop(["ticker", "date"]):
+            columns[name] = pd.api.extensions.take(fundamental_df[name].to_numpy(), indexer, allow_fill=True)
+    return pd.DataFrame(columns)
+
+
+def compact_frame(df, schema=COMPACT_SCHEMA):
+    """
+    Returns df reduced to the columns of `schema`, each cast to its storage dtype, with 'date' turned into int32
+    'day' offsets. Meant for frames that are kept around: caches, snapshots and multi-ticker history.
+    """
+    columns = {}
+    for name in df.columns:
+        if name == "day":  # Already compacted
+            columns["day"] = df["day"].astype(schema["date"])
+        elif name not in schema:
+            continue
+        elif name == "date":
+            columns["day"] = _day_numbers(df["date"]).astype(schema["date"])
+        else:
+            columns[name] = df[name].astype(schema[name])
+    return pd.DataFrame(columns, index=df.index)
+
+
+def expand_frame(df):
+    """Inverse of compact_frame for display and scoring code: 'day' back to a datetime64 'date', categories to str."""
+    columns = {}
+    for name in df.columns:
+        if name == "day":
+            columns["date"] = df["day"].to_numpy().astype("datetime64[D]").astype("datetime64[ns]")
+        elif isinstance(df[name].dtype, pd.CategoricalDtype):
+            columns[name] = df[name].astype(object)
+        else:
+            columns[name] = df[name]
+    return pd.DataFrame(columns, index=df.index)
+
+
+def merge_sources(share_prices_df, income_df, balance_sheet_df, shares_outstanding_df):
+    """Attaches the latest known income, balance sheet and shares outstanding rows to each daily price row."""
+    return asof_join(share_prices_df, income_df, balance_sheet_df, shares_outstanding_df)
+
+
+def add_ratios(merged_df, max_pe=None):
+    """
+    Adds market capitalization and the P/E ratio (market cap / net income).
+    If max_pe is given, negative ratios are dropped and large ones are clipped to max_pe.
+    """
+    merged_df["market_capitalization"] = merged_df["close"] * merged_df["shares_outstanding"]
+    p_e_ratio = merged_df["market_capitalization"] / merged_df["net_income"]
+    p_e_ratio = p_e_ratio.replace([np.inf, -np.inf], np.nan)
+    if max_pe is not None:
+        p_e_ratio = p_e_ratio.where(p_e_ratio >= 0, np.nan).clip(upper=max_pe)
+    merged_df["p_e_ratio"] = p_e_ratio
+    return merged_df
+
+
+def add_sma(merged_df, window=50, min_periods=1):
+    """Adds the per-ticker simple moving average of the close price as sma_<window>."""
+    return add_indicators(merged_df, sma_windows=(window,), sma_min_periods=min_periods)
+
+
+def add_target(merged_df):
+    """Adds next day's close price as the target variable."""
+    merged_df["next_close"] = merged_df.groupby("ticker")["close"].shift(-1)
+    return merged_df
+
+
+def build_features(share_prices_df, income_df, balance_sheet_df, shares_outstanding_df,
+                   sma_window=50, sma_min_periods=1, max_pe=None, compact=False):
+    """
+    Runs the full feature pipeline: as-of join, market cap, P/E, SMA and next_close.
+    Rows missing one of the model features are dropped, as are the fiscal_period/fiscal_year columns.
+    With compact=True, the fundamentals are pruned to FEATURE_INPUTS before the join and the result is stored
+    with compact_frame (categorical ticker, float32 values, int32 'day' instead of 'date').
+    Results are memoized by the content hash of the inputs, so reruns with unchanged data skip the work;
+    a copy is returned so callers can modify it freely.
+    """
+    inputs = [share_prices_df, income_df, balance_sheet_df, shares_outstanding_df]
+    key = (tuple(frame_fingerprint(df) for df in inputs), sma_window, sma_min_periods, max_pe, compact)
+    cached = FEATURE_CACHE.get(key)
+    if cached is not None:
+        return cached.copy()
+
+    if compact:
+        sources = zip(FEATURE_INPUTS.values(), [income_df, balance_sheet_df, shares_outstanding_df])
+        merged_df = asof_join(
+            share_prices_df[["date", "ticker", "close"]],
+            *(df[["ticker", "date"] + needed] for needed, df in sources if needed),
+        )
+    else:
+        merged_df = merge_sources(*inputs)
+    merged_df = add_ratios(merged_df, max_pe=max_pe)
+    merged_df = add_sma(merged_df, window=sma_window, min_periods=sma_min_periods)
+    merged_df = add_target(merged_df)
+
+    merged_df = merged_df.dropna(subset=["close", "p_e_ratio", f"sma_{sma_window}"])
+    merged_df = merged_df.drop(columns=["fiscal_period", "fiscal_year"], errors="ignore")
+    if compact:
+        merged_df = compact_frame(merged_df, dict(COMPACT_SCHEMA, **{f"sma_{sma_window}": "float32"}))
+
+    FEATURE_CACHE.put(key, merged_df)
+    return merged_df.copy()
@@ -0,0 +1,96 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+
+def file_key(path, *parts):
+    """
+    Builds a cache key for data derived from a file: absolute path, modification time and size, plus any extra
+    parts (e.g. the requested members). Editing or replacing the file gives a new key.
+    """
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size) + tuple(parts)
+
+
+def estimate_size(value):
+    """Estimates the in-memory size of a cached value in bytes (DataFrames, Series and dicts/lists of them)."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+
+class FrameCache:
+    """
+    Thread-safe in-memory LRU cache with a byte budget.
+    Values larger than the whole budget are not stored; otherwise the least recently used entries are evicted
+    until the new value fits. Hit, miss and eviction counts are kept for reporting.
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (value, size)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Returns the cached value for key (marking it as recently used), or default."""
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Stores value under key, evicting least recently used entries to stay within max_bytes."""
+        size = estimate_size(value)
+        with self.lock:
+            if key in self.entries:
+                self.current_bytes -= self.entries.pop(key)[1]
+            if size > self.max_bytes:
+                return value
+            while self.entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            self.entries[key] = (value, size)
+            self.current_bytes += size
+        return value
+
+    def get_or_load(self, key, loader):
+        """Returns the cached value for key, calling loader() and caching its result on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = self.put(key, loader())
+        return value
+
+    def clear(self):
+        """Drops every entry (counters are kept)."""
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Returns hit/miss/eviction counters together with the number of entries and bytes held."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+
+def segment_starts(keys):
+    """
+    For an array of group keys laid out in contiguous blocks (e.g. a frame sorted by ticker), returns for every row
+    the position of the first row of its block.
+    """
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    is_start = np.empty(len(keys), dtype=bool)
+    is_start[0] = True
+    is_start[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(is_start, np.arange(len(keys)), 0))
+
+
+def _window_bounds(starts, window):
+    """Returns the first row (inclusive) of each row's trailing window, clipped to its segment."""
+    return np.maximum(starts, np.arange(len(starts)) - window + 1)
+
+
+def _segment_means(values, valid, starts):
+    """Returns, for every row, the mean of the valid values of its segment (0 for all-NaN segments)."""
+    bounds = np.flatnonzero(starts == np.arange(len(starts)))
+    if len(bounds) == 0:
+        return np.zeros(0)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), bounds)
+    counts = np.add.reduceat(valid.astype(np.float64), bounds)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.nan_to_num(sums / counts)
+    return np.repeat(means, np.diff(np.append(bounds, len(starts))))
+
+
+def _windowed_sum(cumulative, lower, upper):
+    """Sums a prefix-summed array over [lower, upper] for every row."""
+    padded = np.concatenate(([0.0], cumulative))
+    return padded[upper + 1] - padded[lower]
+
+
+def rolling_mean(values, starts, window, min_periods=None):
+    """
+    Trailing rolling mean over every segment at once, using prefix sums instead of one pass per group.
+    NaNs are skipped; rows with fewer than min_periods valid values in the window are NaN (same rules as
+    pandas' rolling().mean()).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    min_periods = window if min_periods is None else min_periods
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))
+    lower = _window_bounds(starts, window)
+
+    # Prefix sums are taken relative to each segment's mean to limit float cancellation on long series
+    offset = _segment_means(values, valid, starts)
+    centred = np.where(valid, values - offset, 0.0)
+    total = _windowed_sum(np.cumsum(centred), lower, rows)
+    count = _windowed_sum(np.cumsum(valid, dtype=np.float64), lower, rows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count + offset
+    return np.where(count >= max(min_periods, 1), mean, np.nan)
+
+
+def rolling_std(values, starts, window, min_periods=None, ddof=1):
+    """Trailing rolling standard deviation over every segment at once (prefix sums of x and x**2)."""
+    values = np.asarray(values, dtype=np.float64)
+    min_periods = window if min_periods is None else min_periods
+    valid = ~np.isnan(values)
+    rows = np.arange(len(values))
+    lower = _window_bounds(starts, window)
+
+    offset = _segment_means(values, valid, starts)
+    centred = np.where(valid, values - offset, 0.0)
+    total = _windowed_sum(np.cumsum(centred), lower, rows)
+    squares = _windowed_sum(np.cumsum(centred ** 2), lower, rows)
+    count = _windowed_sum(np.cumsum(valid, dtype=np.float64), lower, rows)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        variance = (squares - total ** 2 / count) / (count - ddof)
+    std = np.sqrt(np.clip(variance, 0.0, None))
+    return np.where((count >= max(min_periods, 1)) & (count > ddof), std, np.nan)
+
+
+def ema(values, keys, span):
+    """Exponential moving average (adjust=False) restarted at every segment, computed in one grouped pass."""
+    series = pd.Series(np.asarray(values, dtype=np.float64))
+    result = series.groupby(np.asarray(keys), sort=False).ewm(span=span, adjust=False).mean()
+    return result.droplevel(0).sort_index().to_numpy()
+
+
+def log_returns(values, starts):
+    """Daily log returns within each segment; the first row of every segment is NaN."""
+    values = np.asarray(values, dtype=np.float64)
+    returns = np.full(len(values), np.nan)
+    if len(values) > 1:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            returns[1:] = np.log(values[1:] / values[:-1])
+    returns[starts == np.arange(len(values))] = np.nan
+    return returns
+
+
+def add_indicators(df, group_col="ticker", value_col="close", sma_windows=(50,), sma_min_periods=1,
+                   ema_spans=(), volatility_windows=()):
+    """
+    Adds sma_<w>, ema_<span> and volatility_<w> (rolling std of daily log returns) columns for every group in one
+    pass over contiguous arrays. Rows of a group do not need to be adjacent; the frame is processed in
+    (group, original order) order and the results are written back in place.
+    """
+    keys = df[group_col]
+    codes = keys.cat.codes.to_numpy() if isinstance(keys.dtype, pd.CategoricalDtype) else pd.factorize(keys)[0]
+    n_blocks = 1 + np.count_nonzero(codes[1:] != codes[:-1]) if len(codes) else 0
+    n_groups = np.count_nonzero(np.bincount(codes + 1)) if len(codes) else 0
+    if n_blocks > n_groups:
+        order = np.argsort(codes, kind="stable")  # Groups are interleaved: make them contiguous first
+    else:
+        order = np.arange(len(codes))
+    sorted_codes = codes[order]
+    values = df[value_col].to_numpy(dtype=np.float64)[order]
+    starts = segment_starts(sorted_codes)
+
+    results = {}
+    for window in sma_windows:
+        results[f"sma_{window}"] = rolling_mean(values, starts, window, sma_min_periods)
+    for span in ema_spans:
+        results[f"ema_{span}"] = ema(values, sorted_codes, span)
+    if volatility_windows:
+        returns = log_returns(values, starts)
+        for window in volatility_windows:
+            results[f"volatility_{window}"] = rolling_std(returns, starts, window)
+
+    for name, sorted_values in results.items():
+        column = np.empty(len(df), dtype=np.float64)
+        column[order] = sorted_values
+        df[name] = column
+    return df
@@ -0,0 +1,91 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+DEFAULT_METRICS_LOG = "logs/metrics.jsonl"
+
+
+class Metrics:
+    """
+    Thread-safe collector of stage timings and counters.
+    Timings are grouped by name (count, total, mean and max seconds); counters are plain running sums such as the
+    number of SimFin requests, bytes received or seconds spent waiting on the rate limiter.
+    """
+    def __init__(self):
+        self.timings = {}  # name -> list of durations in seconds
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, name):
+        """Times the enclosed block and records it under name, also when the block raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        """Decorator version of timer; the function's qualified name is used when name is not given."""
+        def decorator(fn):
+            label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, name, seconds):
+        """Records one duration in seconds under name."""
+        with self.lock:
+            self.timings.setdefault(name, []).append(seconds)
+
+    def increment(self, name, value=1):
+        """Adds value to the counter name."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Returns {'timings': {name: summary}, 'counters': {name: value}} as plain, JSON-serializable dicts."""
+        with self.lock:
+            timings = {
+                name: {
+                    "count": len(values),
+                    "total_s": sum(values),
+                    "mean_s": sum(values) / len(values),
+                    "max_s": max(values),
+                }
+                for name, values in self.timings.items()
+            }
+            return {"timings": timings, "counters": dict(self.counters)}
+
+    def reset(self):
+        """Drops every timing and counter."""
+        with self.lock:
+            self.timings.clear()
+            self.counters.clear()
+
+
+def cache_ratios(**caches):
+    """Returns the stats() of every named cache (ResponseCache or FrameCache), skipping the ones that are None."""
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+
+def write_jsonl(record, path=DEFAULT_METRICS_LOG):
+    """Appends one record to a JSON Lines log, stamped with the current time."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    line = json.dumps(dict({"created": datetime.now().isoformat(timespec="milliseconds")}, **record), default=str)
+    with open(path, "a") as f:
+        f.write(line + "\n")
+
+
+# Process-wide collector used when no per-run Metrics is passed in
+METRICS = Metrics()
@@ -0,0 +1,51 @@
+import os
+import threading
+from tree_predictor import TreePredictor
+
+# Process-wide registry: (kind, path) -> (mtime, model). Shared by every Streamlit session and rerun.
+_MODELS = {}
+_LOCK = threading.Lock()
+
+
+def _load_cached(kind, path, loader):
+    """Returns the cached model for (kind, path), calling loader(path) only when the file's mtime changed."""
+    mtime = os.path.getmtime(path)
+    with _LOCK:
+        cached = _MODELS.get((kind, path))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        model = loader(path)
+        _MODELS[(kind, path)] = (mtime, model)
+        return model
+
+
+def _load_booster(path):
+    """Parses a model file into an XGBoost Booster."""
+    import xgboost as xgb  # Only imported when the full runtime is actually needed
+
+    model = xgb.Booster()
+    model.load_model(path)
+    return model
+
+
+def load_model(path="mag7_final_model.json"):
+    """
+    Returns the XGBoost Booster stored at `path`, parsing the file only once per process.
+    The model is reloaded automatically when the file's modification time changes.
+    """
+    return _load_cached("booster", path, _load_booster)
+
+
+def load_predictor(path="mag7_final_model.json"):
+    """
+    Returns the compiled TreePredictor for the model at `path`, cached and reloaded the same way as load_model.
+    Scoring through it does not need xgboost at all.
+    """
+    return _load_cached("predictor", path, TreePredictor.from_json)
+
+
+def clear_models():
+    """Drops every cached model, forcing the next load_model call to parse the file again."""
+    with _LOCK:
+        _MODELS.clear()
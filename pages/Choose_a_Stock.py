@@ -1,8 +1,4 @@
 import streamlit as st
-import pandas as pd
-import xgboost as xgb
-import matplotlib.pyplot as plt
-from simfin_api import SimFinAPI
 from datetime import datetime, timedelta
 import os
 import logging
@@ -26,13 +22,41 @@ else:
     st.sidebar.warning("⚠️ Please enter your SimFin API key to proceed.")
     st.stop()  # Stop execution until user provides the API key
 
-# Initialize SimFin API
-logging.info("Initializing SimFin API")
-api = SimFinAPI(api_key=api_key)
+# Heavy dependencies (pandas, numpy, requests and everything built on them) are only imported past the API-key gate,
+# so the key prompt renders without paying for them. matplotlib and xgboost are imported further down, on first use.
+import pandas as pd
+from simfin_api import SimFinAPI, SimFinAPIError
+from response_cache import ResponseCache
+from price_store import PRICE_CACHE, PriceStore
+from model_registry import load_predictor
+from signals import predict_signals, signal_accuracy
+from features import FEATURE_CACHE, build_features, expand_frame
+from scheduler import SNAPSHOT_CACHE, STALE_AFTER_SESSIONS, UNIVERSE, load_snapshot, sessions_behind
+from instrumentation import Metrics, cache_ratios, write_jsonl
+from charts import CHART_CACHE, price_chart_png, price_chart_series
+
+# Per-run timings and counters, written to logs/metrics.jsonl at the end of the page
+metrics = Metrics()
+page_start = datetime.now()
+
+
+@st.cache_resource
+def get_api(api_key):
+    """
+    One SimFin client per API key for the whole server process, so its keep-alive connections, rate limiter,
+    response cache and price store survive reruns and are shared between sessions using the same key.
+    """
+    logging.info("Initializing SimFin API")
+    return SimFinAPI(api_key=api_key, cache=ResponseCache(), price_store=PriceStore())
+
+
+# Shared client, recording this run's requests into the per-run metrics
+api = get_api(api_key).with_metrics(metrics)
+response_cache = api.cache
 
 # Sidebar stock selection (below API key input)
 st.sidebar.title("📊 Select a Stock")
-stocks = ['AAPL', 'MSFT', 'GOOG', 'AMZN', 'NVDA', 'META', 'TSLA']
+stocks = UNIVERSE
 selected_stock = st.sidebar.radio("Choose a stock:", stocks)
 logging.info(f"Selected stock: {selected_stock}")
 
@@ -50,142 +74,162 @@ with col1:
 with col2:
     st.title(f"Live Trading - {selected_stock}")
 
-# Set time range
-start_date = (datetime.today() - timedelta(days=365)).strftime("%Y-%m-%d")
-logging.info(f"Start date: {start_date}")
-
-# Adjust end_date based on the weekday
-today = datetime.today()
-weekday = today.weekday()
-if weekday == 0:  # Monday → Use last Friday's data
-    end_date = (today - timedelta(days=3)).strftime("%Y-%m-%d")
-elif weekday == 6:  # Sunday → Use last Friday's data
-    end_date = (today - timedelta(days=2)).strftime("%Y-%m-%d")
-else:  # Normal case: Use yesterday's data
-    end_date = (today - timedelta(days=1)).strftime("%Y-%m-%d")
-logging.info(f"End date: {end_date}")
-
-# Fetch stock price data
-st.write(f"📡 Fetching {selected_stock} stock data from SimFin API... Please wait.")
-try:
-    share_prices_df = api.get_share_prices(selected_stock, start_date, end_date)
-    income_df = api.get_income_statement(selected_stock, start_date, end_date)
-    balance_sheet_df = api.get_balance_sheet(selected_stock, start_date, end_date)
-    shares_outstanding_df = api.get_shares_outstanding(selected_stock, start_date, end_date)
-    logging.info("Successfully fetched stock data")
-except Exception as e:
-    logging.error(f"Error fetching data: {e}")
-    st.error(f"❌ Error fetching data: {e}")
-    st.stop()
-
-# Ensure data is not empty
-if share_prices_df.empty or income_df.empty or balance_sheet_df.empty or shares_outstanding_df.empty:
-    logging.warning("No stock data available")
-    st.error("❌ No stock data available. Please try another stock or check back later.")
-    st.stop()
-
-# Convert date columns to datetime format
-def convert_to_datetime(df, column):
+# Read the signals snapshot written by scheduler.py after each close, so a page load does no fetching or scoring
+with metrics.timer("page.load_snapshot"):
+    snapshot = load_snapshot()
+
+# A snapshot left behind by a stopped scheduler must not keep serving old predictions
+if snapshot is not None and sessions_behind(snapshot["end_date"]) > STALE_AFTER_SESSIONS:
+    logging.warning(f"Snapshot for {snapshot['end_date']} is stale, scoring on demand")
+    st.warning(f"⚠️ Precomputed signals stop at {snapshot['end_date']}; fetching current data instead.")
+    snapshot = None
+
+if snapshot is not None and selected_stock in snapshot["tickers"]:
+    start_date, end_date = snapshot["start_date"], snapshot["end_date"]
+    # The snapshot is stored compacted; only the selected ticker's rows are expanded back to dates and strings
+    share_prices_df, merged_df, signals_df = (
+        expand_frame(snapshot[name][snapshot[name]["ticker"] == selected_stock].reset_index(drop=True))
+        for name in ("prices", "features", "signals")
+    )
+    logging.info(f"Using the precomputed snapshot for {end_date}")
+    st.caption(f"🕓 Signals precomputed after the {end_date} close.")
+else:
+    # No current snapshot (scheduler not running): fetch, build and score on demand
+
+    # Set time range
+    start_date = (datetime.today() - timedelta(days=365)).strftime("%Y-%m-%d")
+    logging.info(f"Start date: {start_date}")
+
+    # Adjust end_date based on the weekday
+    today = datetime.today()
+    weekday = today.weekday()
+    if weekday == 0:  # Monday → Use last Friday's data
+        end_date = (today - timedelta(days=3)).strftime("%Y-%m-%d")
+    elif weekday == 6:  # Sunday → Use last Friday's data
+        end_date = (today - timedelta(days=2)).strftime("%Y-%m-%d")
+    else:  # Normal case: Use yesterday's data
+        end_date = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+    logging.info(f"End date: {end_date}")
+
+    # Fetch stock price data
+    st.write(f"📡 Fetching {selected_stock} stock data from SimFin API... Please wait.")
     try:
-        df[column] = pd.to_datetime(df[column])
+        with metrics.timer("page.fetch_bundle"):
+            share_prices_df, income_df, balance_sheet_df, shares_outstanding_df = api.fetch_bundle(selected_stock, start_date, end_date)
+        logging.info("Successfully fetched stock data")
+    except SimFinAPIError as e:
+        logging.error(f"SimFin request failed: {e}")
+        st.error(f"❌ SimFin is not responding right now ({e}). Please try again in a moment.")
+        st.stop()
     except Exception as e:
-        logging.warning(f"Date conversion error: {e}")
-        st.warning(f"⚠️ Date conversion error: {e}")
-convert_to_datetime(share_prices_df, "date")
-convert_to_datetime(income_df, "date")
-convert_to_datetime(balance_sheet_df, "date")
-convert_to_datetime(shares_outstanding_df, "date")
-
-# Merge datasets
-try:
-    merged_df = share_prices_df.merge(income_df, on=["ticker", "date"], how="left")
-    merged_df = merged_df.merge(balance_sheet_df, on=["ticker", "date"], how="left")
-    merged_df = merged_df.merge(shares_outstanding_df, on=["ticker", "date"], how="left")
-    logging.info("Successfully merged datasets")
-except Exception as e:
-    logging.error(f"Error merging data: {e}")
-    st.error(f"❌ Error merging data: {e}")
-    st.stop()
-
-# Sort and forward-fill missing values
-merged_df = merged_df.sort_values(by=["ticker", "date"], ascending=[True, True])
-merged_df.ffill(inplace=True)
-
-# Compute P/E ratio
-try:
-    merged_df["market_capitalization"] = merged_df["close"] * merged_df["shares_outstanding"]
-    merged_df["p_e_ratio"] = merged_df["market_capitalization"] / merged_df["net_income"]
-    merged_df["sma_50"] = merged_df.groupby("ticker")["close"].transform(lambda x: x.rolling(window=50, min_periods=1).mean())
-    logging.info("Successfully computed financial metrics")
-except KeyError as e:
-    logging.error(f"Missing necessary columns for calculations: {e}")
-    st.error(f"❌ Missing necessary columns for calculations: {e}")
-    st.stop()
+        logging.error(f"Error fetching data: {e}")
+        st.error(f"❌ Error fetching data: {e}")
+        st.stop()
 
-# Add next day's close price as a target variable
-merged_df["next_close"] = merged_df.groupby("ticker")["close"].shift(-1)
+    # Ensure data is not empty
+    if share_prices_df.empty or income_df.empty or balance_sheet_df.empty or shares_outstanding_df.empty:
+        logging.warning("No stock data available")
+        st.error("❌ No stock data available. Please try another stock or check back later.")
+        st.stop()
 
-# Drop rows with missing values in critical columns
-merged_df.dropna(subset=["close", "p_e_ratio", "sma_50"], inplace=True)
+    # Merge datasets and build the model features (memoized, so unchanged inputs skip the work)
+    try:
+        with metrics.timer("page.build_features"):
+            merged_df = build_features(share_prices_df, income_df, balance_sheet_df, shares_outstanding_df)
+        logging.info("Successfully merged datasets and computed financial metrics")
+    except KeyError as e:
+        logging.error(f"Missing necessary columns for calculations: {e}")
+        st.error(f"❌ Missing necessary columns for calculations: {e}")
+        st.stop()
+    except Exception as e:
+        logging.error(f"Error merging data: {e}")
+        st.error(f"❌ Error merging data: {e}")
+        st.stop()
 
-# Drop the fiscal_period column if it exists
-if "fiscal_period" in merged_df.columns:
-    merged_df = merged_df.drop(columns=["fiscal_period"])
+    # Load the trained XGBoost model
+    try:
+        with metrics.timer("page.load_model"):
+            model = load_predictor("mag7_final_model.json")  # Compiled once per process, reloaded if the file changes
+        logging.info("Model successfully loaded")
+    except Exception as e:
+        logging.error(f"Error loading model: {e}")
+        st.error(f"❌ Error loading model: {e}")
+        st.stop()
 
-# Drop the fiscal_year column if it exists
-if "fiscal_year" in merged_df.columns:
-    merged_df = merged_df.drop(columns=["fiscal_year"])
+    # Score the whole history in a single predict call; yesterday's row gives the live signal
+    try:
+        with metrics.timer("page.predict"):
+            signals_df = predict_signals(model, merged_df)
+        logging.info(f"Scored {len(signals_df)} rows in one batch")
+    except Exception as e:
+        logging.error(f"Prediction error: {e}")
+        st.error(f"❌ Prediction error: {e}")
+        signals_df = None
 
-show_merged_df = merged_df
+show_merged_df = merged_df.copy()
 
 # Display only the last 10 rows
 st.subheader(f"📊 API Live Data for {selected_stock} (Latest 10 Closing Data)")
 show_merged_df["date"] = show_merged_df["date"].dt.date  # Converts to date format
 st.dataframe(show_merged_df.set_index("date").tail(10))
 
-# Load the trained XGBoost model
-try:
-    model = xgb.Booster()
-    model.load_model("mag7_final_model.json")
-    logging.info("Model successfully loaded")
-except Exception as e:
-    logging.error(f"Error loading model: {e}")
-    st.error(f"❌ Error loading model: {e}")
-    st.stop()
-
-# Convert 'date' column to datetime explicitly
-merged_df["date"] = pd.to_datetime(merged_df["date"])
-
 # Ensure yesterday's date is in correct format
 yesterday_date = pd.to_datetime(end_date).date()
 
-# Filter for yesterday's data
-yesterday_df = merged_df[merged_df["date"] == pd.to_datetime(yesterday_date)][["ticker", "close", "p_e_ratio", "sma_50"]]
+if signals_df is not None:
+    # Filter for yesterday's data
+    yesterday_mask = merged_df["date"] == pd.to_datetime(yesterday_date)
+    yesterday_df = merged_df[yesterday_mask][["ticker", "close", "p_e_ratio", "sma_50"]]
+    yesterday_signals = signals_df[signals_df["date"] == pd.to_datetime(yesterday_date)]
 
-if not yesterday_df.empty:
-    try:
-        dmatrix = xgb.DMatrix(yesterday_df[["close", "p_e_ratio", "sma_50"]])
-        prediction = model.predict(dmatrix)[0]
-        prediction_label = "📈 Buy" if prediction > 0.5 else "📉 Sell"
+    if not yesterday_df.empty and not yesterday_signals.empty:
+        prediction_label = yesterday_signals["signal"].iloc[0]
         yesterday_df["Prediction"] = prediction_label
         logging.info(f"Prediction generated for next closing price: {prediction_label}")
-        
+
         # Display predictions
         st.subheader("📊 Prediction for Next Closing Price Movement")
         st.write(f"🔮 **{prediction_label}** signal for {selected_stock}")
         st.dataframe(yesterday_df)
-    except Exception as e:
-        logging.error(f"Prediction error: {e}")
-        st.error(f"❌ Prediction error: {e}")
+
+    # Historical accuracy of the signal over the loaded window
+    accuracy_df = signal_accuracy(signals_df)
+    if not accuracy_df.empty:
+        accuracy = accuracy_df["accuracy"].iloc[0]
+        observations = accuracy_df["observations"].iloc[0]
+        st.metric("🎯 Historical signal accuracy (last year)", f"{accuracy:.1%}", help=f"Based on {observations} trading days")
 
 # Plot Closing Price Trend
 st.subheader(f"📈 Closing Price Trend for {selected_stock} (Last Year)")
-plt.figure(figsize=(10, 5))
-plt.plot(share_prices_df["date"], share_prices_df["close"], label="Closing Price", color="blue")
-plt.xlabel("Date")
-plt.ylabel("Closing Price (USD)")
-plt.title(f"{selected_stock} Closing Price Over the Last Year")
-plt.legend()
-st.pyplot(plt)
+interactive_chart = st.sidebar.checkbox("Interactive chart", value=False)
+with metrics.timer("page.render_chart"):
+    if interactive_chart:
+        # Downsampled series drawn in the browser, no server-side rendering at all
+        st.line_chart(price_chart_series(share_prices_df, selected_stock))
+    else:
+        # Rendered once per ticker and data version, then served from CHART_CACHE on every rerun
+        st.image(price_chart_png(share_prices_df, selected_stock))
 
 logging.info("Successfully plotted closing price trend")
+
+# Record where this page load spent its time
+metrics.observe("page.total", (datetime.now() - page_start).total_seconds())
+diagnostics = dict(
+    metrics.snapshot(),
+    ticker=selected_stock,
+    caches=cache_ratios(
+        responses=response_cache, features=FEATURE_CACHE, prices=PRICE_CACHE,
+        snapshots=SNAPSHOT_CACHE, charts=CHART_CACHE,
+    ),
+)
+try:
+    write_jsonl(diagnostics)
+except OSError as e:
+    logging.warning(f"Could not write metrics log: {e}")
+
+# Hidden diagnostics panel, shown only when the page is opened with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1":
+    with st.expander("🛠️ Diagnostics", expanded=True):
+        timings_df = pd.DataFrame.from_dict(diagnostics["timings"], orient="index")
+        st.dataframe(timings_df.sort_values(by="total_s", ascending=False))
+        st.json({"counters": diagnostics["counters"], "caches": diagnostics["caches"]})
@@ -0,0 +1,50 @@
+import json
+import os
+import threading
+import pandas as pd
+from frame_cache import FrameCache, file_key
+
+# Process-wide cache of loaded price files, so Streamlit reruns skip re-reading files that did not change
+PRICE_CACHE = FrameCache(max_bytes=64 * 1024 * 1024)
+
+
+class PriceStore:
+    """
+    Local per-ticker store of daily share prices.
+    Each ticker keeps its price series in a pickle file plus a small JSON file with the date range already covered,
+    so later refreshes only need to ask the API for the days after the covered end date.
+    """
+    def __init__(self, directory=".cache/prices", cache=None):
+        self.directory = directory
+        self.cache = cache if cache is not None else PRICE_CACHE
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, ticker):
+        """Returns the data and metadata file paths for a ticker."""
+        base = os.path.join(self.directory, ticker.upper())
+        return f"{base}.pkl", f"{base}.json"
+
+    def load(self, ticker):
+        """Returns (prices_df, coverage) for a ticker; coverage is a dict with 'start' and 'end' or None."""
+        data_path, meta_path = self._paths(ticker)
+        with self.lock:
+            if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+                return pd.DataFrame(columns=['date', 'ticker', 'close']), None
+            key = file_key(data_path) + file_key(meta_path)
+            return self.cache.get_or_load(key, lambda: self._read(data_path, meta_path))
+
+    @staticmethod
+    def _read(data_path, meta_path):
+        """Reads the stored prices and coverage of a ticker from disk."""
+        with open(meta_path) as f:
+            coverage = json.load(f)
+        return pd.read_pickle(data_path), coverage
+
+    def save(self, ticker, df, start_date, end_date):
+        """Stores the full price series of a ticker together with the date range it covers."""
+        data_path, meta_path = self._paths(ticker)
+        with self.lock:
+            df.to_pickle(data_path)
+            with open(meta_path, "w") as f:
+                json.dump({"start": start_date, "end": end_date}, f)
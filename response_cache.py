@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_CLOSE_HOUR = 16
+PUBLISH_DELAY_MINUTES = 30  # SimFin publishes a session's prices some time after the close
+
+# Default time-to-live per endpoint, in seconds. Prices are handled separately (valid until the next session is
+# published, see seconds_until_next_close).
+DEFAULT_TTLS = {
+    "companies/statements/compact": 3 * 24 * 3600,  # Statements only change once a quarter
+    "companies/common-shares-outstanding": 3 * 24 * 3600,
+}
+DEFAULT_TTL = 24 * 3600
+
+
+def last_session_date(now=None, delay_minutes=PUBLISH_DELAY_MINUTES):
+    """
+    Returns the date (YYYY-MM-DD) of the last trading session whose close is at least delay_minutes old,
+    in New York time. Weekends roll back to Friday.
+    """
+    now = now or datetime.now(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0) + timedelta(minutes=delay_minutes)
+    day = now.date() if now >= close else now.date() - timedelta(days=1)
+    while day.weekday() >= 5:  # Saturday and Sunday have no session
+        day -= timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+def seconds_until_next_close(now=None, delay_minutes=PUBLISH_DELAY_MINUTES):
+    """
+    Returns the seconds until delay_minutes after the next US market close (16:00 New York time, Monday to
+    Friday): today's if that moment is still ahead, otherwise the next weekday's.
+    """
+    now = now or datetime.now(MARKET_TZ)
+    close = now.replace(hour=MARKET_CLOSE_HOUR, minute=0, second=0, microsecond=0) + timedelta(minutes=delay_minutes)
+    while close <= now or close.weekday() >= 5:  # Skip Saturday and Sunday
+        close += timedelta(days=1)
+    return (close.astimezone(timezone.utc) - now.astimezone(timezone.utc)).total_seconds()  # DST-safe
+
+
+def latest_price_date(data):
+    """Returns the last 'Date' (YYYY-MM-DD) of a prices/compact response, or None when it has no rows."""
+    dates = [
+        row[company["columns"].index("Date")]
+        for company in data if isinstance(company, dict) and "Date" in company.get("columns", [])
+        for row in company.get("data", [])
+    ]
+    return max(dates, default=None)
+
+
+class ResponseCache:
+    """
+    Persistent SQLite cache for raw SimFin JSON responses.
+    Entries are keyed by endpoint, params and API key, expire per endpoint and are evicted least-recently-used
+    once the total payload size goes over `max_bytes`.
+    """
+    def __init__(self, path=".cache/simfin_responses.sqlite", max_bytes=200 * 1024 * 1024, ttls=None,
+                 publish_delay_minutes=PUBLISH_DELAY_MINUTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.publish_delay_minutes = publish_delay_minutes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, endpoint TEXT, payload TEXT, size INTEGER, "
+                "expires_at REAL, last_access REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses (last_access)")
+
+    @contextmanager
+    def _connect(self):
+        """Opens a short-lived connection; one per call keeps the cache safe to share between threads."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # Commits on success, rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(endpoint, params, api_key):
+        """Builds a stable key from the endpoint, the request params and the API key."""
+        raw = json.dumps([endpoint, sorted((params or {}).items()), api_key], default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def ttl_for(self, endpoint, now=None):
+        """Returns the time-to-live in seconds for an endpoint; prices expire when the next session is published."""
+        if endpoint.startswith("companies/prices"):
+            return seconds_until_next_close(now, self.publish_delay_minutes)
+        return self.ttls.get(endpoint, DEFAULT_TTL)
+
+    def awaits_session(self, endpoint, params, data, now=None):
+        """True for a price response whose window reaches the last session but that does not contain it yet."""
+        if not endpoint.startswith("companies/prices"):
+            return False
+        session = last_session_date(now, self.publish_delay_minutes)
+        end = (params or {}).get("end")
+        if end is not None and str(end) < session:  # Historical window: complete already
+            return False
+        latest = latest_price_date(data)
+        return latest is None or latest < session
+
+    def get(self, endpoint, params, api_key):
+        """Returns the cached response, or None if it is missing or expired."""
+        key = self.make_key(endpoint, params, api_key)
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            row = conn.execute("SELECT payload, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, endpoint, params, api_key, data):
+        """
+        Stores a response and evicts the least recently used entries if the cache is over budget.
+        Price responses still missing the last session are not stored, so the next call asks SimFin again.
+        """
+        if self.awaits_session(endpoint, params, data):
+            return
+        key = self.make_key(endpoint, params, api_key)
+        payload = json.dumps(data)
+        now = time.time()
+        with self.lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, payload, size, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, payload, len(payload), now + self.ttl_for(endpoint), now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drops expired entries, then the least recently used ones until the cache fits in max_bytes."""
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Removes every cached response."""
+        with self.lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Returns hit/miss/eviction counters together with the current number of entries and bytes stored."""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,160 @@
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+from features import build_features, compact_frame
+from frame_cache import FrameCache, file_key
+from model_registry import load_predictor
+from response_cache import MARKET_TZ, ResponseCache, last_session_date, seconds_until_next_close
+from signals import predict_signals
+from simfin_api import SimFinAPI
+
+UNIVERSE = ['AAPL', 'MSFT', 'GOOG', 'AMZN', 'NVDA', 'META', 'TSLA']
+DEFAULT_SNAPSHOT_DIR = ".cache/snapshots"
+HISTORY_DAYS = 365
+STALE_AFTER_SESSIONS = 2  # Readers stop trusting a snapshot this many sessions behind (one is a slow publication)
+
+# Loaded snapshots, keyed by the files' mtime and size so a new snapshot is picked up on the next rerun
+SNAPSHOT_CACHE = FrameCache(max_bytes=64 * 1024 * 1024)
+
+
+def sessions_behind(end_date, now=None):
+    """Returns how many weekday sessions separate end_date from the last published session (0 when current)."""
+    return max(0, len(pd.bdate_range(end_date, last_session_date(now))) - 1)
+
+
+def _snapshot_paths(snapshot_dir):
+    """Returns the data and metadata file paths of the snapshot."""
+    return os.path.join(snapshot_dir, "signals.pkl"), os.path.join(snapshot_dir, "signals.json")
+
+
+def build_snapshot(api, tickers=UNIVERSE, end_date=None, model_path="mag7_final_model.json"):
+    """
+    Fetches a year of data for every ticker in one batch, builds the features, scores the model and returns the
+    snapshot as a dict with 'prices', 'features' and 'signals' frames (long format, all tickers) plus its dates.
+    The snapshot's end_date is the last date SimFin actually returned prices for, which can be earlier than the
+    requested end_date when the latest session is not published yet.
+    The frames are compacted (see features.compact_frame); readers restore them with features.expand_frame.
+    """
+    end_date = end_date or last_session_date()
+    start_date = (pd.to_datetime(end_date) - timedelta(days=HISTORY_DAYS)).strftime("%Y-%m-%d")
+
+    prices_df, income_df, balance_sheet_df, shares_outstanding_df = api.fetch_bundle_many(tickers, start_date, end_date)
+    if prices_df.empty:
+        raise ValueError(f"No prices returned for {start_date} to {end_date}")
+    end_date = prices_df["date"].max().strftime("%Y-%m-%d")
+    features_df = build_features(prices_df, income_df, balance_sheet_df, shares_outstanding_df, compact=True)
+    signals_df = predict_signals(load_predictor(model_path), features_df)
+    return {
+        "prices": compact_frame(prices_df),
+        "features": features_df,
+        "signals": compact_frame(signals_df),
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+def write_snapshot(snapshot, snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """
+    Stores a snapshot as a pickle plus a small JSON file with its dates and tickers.
+    Both files are written to temporary names first and swapped in, so readers never see a half-written snapshot.
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    data_path, meta_path = _snapshot_paths(snapshot_dir)
+    meta = {
+        "created": datetime.now(MARKET_TZ).isoformat(timespec="seconds"),
+        "start_date": snapshot["start_date"],
+        "end_date": snapshot["end_date"],
+        "tickers": sorted(snapshot["features"]["ticker"].unique().tolist()),
+    }
+    pd.to_pickle({name: snapshot[name] for name in ("prices", "features", "signals")}, data_path + ".tmp")
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+
+def load_snapshot(snapshot_dir=DEFAULT_SNAPSHOT_DIR):
+    """Returns the latest snapshot (frames merged with its metadata), or None when none has been written yet."""
+    data_path, meta_path = _snapshot_paths(snapshot_dir)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None
+
+    def read():
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return dict(pd.read_pickle(data_path), **meta)
+
+    return SNAPSHOT_CACHE.get_or_load(file_key(data_path) + file_key(meta_path), read)
+
+
+def run_once(api, tickers=UNIVERSE, snapshot_dir=DEFAULT_SNAPSHOT_DIR, model_path="mag7_final_model.json"):
+    """Builds and writes one snapshot, logging how long it took."""
+    start = time.perf_counter()
+    meta = write_snapshot(build_snapshot(api, tickers, model_path=model_path), snapshot_dir)
+    logging.info(f"Snapshot for {meta['end_date']} written ({len(meta['tickers'])} tickers) "
+                 f"in {time.perf_counter() - start:.1f}s")
+    return meta
+
+
+def run_forever(api, tickers=UNIVERSE, snapshot_dir=DEFAULT_SNAPSHOT_DIR, model_path="mag7_final_model.json",
+                delay_minutes=30, retry_minutes=15, max_lag_retries=8):
+    """
+    Keeps the snapshot current: refreshes it at start-up if it is missing or stale, then sleeps until
+    delay_minutes after each market close and refreshes again. Failed runs are retried after retry_minutes, as are
+    runs whose prices still end before the last session (SimFin not published yet); after max_lag_retries such
+    runs (e.g. on a market holiday) the scheduler keeps what it has and waits for the next close.
+    """
+    lag_retries = 0
+    while True:
+        snapshot = load_snapshot(snapshot_dir)
+        target = last_session_date(delay_minutes=delay_minutes)
+        if snapshot is None or (snapshot["end_date"] < target and lag_retries < max_lag_retries):
+            try:
+                meta = run_once(api, tickers, snapshot_dir, model_path)
+            except Exception as e:
+                logging.error(f"Snapshot run failed: {e}")
+                time.sleep(retry_minutes * 60)
+                continue
+            if meta["end_date"] < target:
+                lag_retries += 1
+                logging.info(f"Prices end on {meta['end_date']}, {target} not published yet; "
+                             f"retrying in {retry_minutes} minutes")
+                time.sleep(retry_minutes * 60)
+                continue
+        lag_retries = 0
+        time.sleep(seconds_until_next_close(delay_minutes=delay_minutes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the daily signals snapshot after every market close.")
+    parser.add_argument("--api-key", default=None, help="SimFin API key (defaults to SIMFIN_API_KEY from keys.env)")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="Where the snapshot is written")
+    parser.add_argument("--model", default="mag7_final_model.json", help="Model used to score the signals")
+    parser.add_argument("--delay", type=int, default=30, help="Minutes to wait after the close before refreshing")
+    parser.add_argument("--once", action="store_true", help="Write one snapshot and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    api_key = args.api_key
+    if api_key is None:
+        from dotenv import load_dotenv
+
+        load_dotenv('keys.env')
+        api_key = os.getenv("SIMFIN_API_KEY")
+    if not api_key:
+        parser.error("No SimFin API key: pass --api-key or set SIMFIN_API_KEY in keys.env")
+
+    api = SimFinAPI(api_key=api_key, cache=ResponseCache(publish_delay_minutes=args.delay))
+    if args.once:
+        run_once(api, UNIVERSE, args.snapshot_dir, args.model)
+    else:
+        run_forever(api, UNIVERSE, args.snapshot_dir, args.model, delay_minutes=args.delay)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+from features import FEATURE_COLUMNS
+from tree_predictor import TreePredictor
+
+# Batches at least this large are scored by the xgboost Booster instead of the TreePredictor (see TreePredictor).
+# The measured crossover is ~100 rows, but below ~1 000 rows the gap is a few milliseconds, not worth loading the
+# xgboost runtime into a single-ticker page.
+BOOSTER_MIN_ROWS = 1000
+
+
+def _booster_for(predictor):
+    """Returns the Booster matching a TreePredictor, or None if xgboost is missing or the model file is unknown."""
+    if predictor.source_path is None:
+        return None
+    try:
+        from model_registry import load_model
+
+        return load_model(predictor.source_path)
+    except ImportError:
+        return None
+
+
+def predict_signals(model, features_df, feature_columns=FEATURE_COLUMNS, threshold=0.5,
+                    booster_min_rows=BOOSTER_MIN_ROWS):
+    """
+    Scores every row of a (multi-ticker) feature frame in a single predict call.
+    `model` can be a TreePredictor or an xgboost Booster; a TreePredictor hands batches of booster_min_rows rows
+    or more to the equivalent Booster, which is faster at that size. Returns a frame with ticker, date, close,
+    next_close (if present), the predicted probability and the Buy/Sell signal, sorted by ticker and date.
+    Compacted frames keep their int32 'day' column in place of 'date'.
+    """
+    keep = [col for col in ["ticker", "date", "day", "close", "next_close"] if col in features_df.columns]
+    signals_df = features_df[keep].copy()
+    if features_df.empty:
+        signals_df["probability"] = pd.Series(dtype="float32")
+        signals_df["signal"] = pd.Series(dtype="object")
+        return signals_df
+
+    X = features_df[feature_columns]
+    if isinstance(model, TreePredictor) and len(X) >= booster_min_rows:
+        booster = _booster_for(model)
+        if booster is not None:
+            model = booster
+    if isinstance(model, TreePredictor):
+        probabilities = model.predict(X)
+    else:
+        import xgboost as xgb  # Booster path only
+
+        probabilities = model.predict(xgb.DMatrix(X))
+
+    signals_df["probability"] = probabilities
+    signals_df["signal"] = np.where(probabilities > threshold, "📈 Buy", "📉 Sell")
+    day_column = "date" if "date" in signals_df.columns else "day"
+    return signals_df.sort_values(by=["ticker", day_column]).reset_index(drop=True)
+
+
+def signal_accuracy(signals_df, threshold=0.5):
+    """
+    Returns the historical hit rate of the signals per ticker: the share of rows whose predicted direction matches
+    the actual move from close to next_close. Rows without a known next_close are ignored.
+    """
+    known = signals_df.dropna(subset=["next_close"])
+    predicted_up = known["probability"] > threshold
+    actual_up = known["next_close"] > known["close"]
+    hits = (predicted_up == actual_up).groupby(known["ticker"]).agg(["mean", "size"])
+    return hits.rename(columns={"mean": "accuracy", "size": "observations"}).reset_index()
@@ -1,38 +1,315 @@
+import copy
 import requests
 import pandas as pd
+import random
+import threading
 import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from instrumentation import METRICS
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+    Tokens refill continuously at `rate` per second up to `capacity`; a call only sleeps when the bucket is empty.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.max_rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Adds the tokens earned since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self):
+        """Takes one token, waiting only as long as needed for it to become available. Returns the time waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def throttle(self, factor=0.5, min_rate=0.1, pause=0.0):
+        """
+        Backs off after a 429 response: the refill rate is multiplied by factor (not below min_rate), the bucket is
+        emptied and every caller waits at least `pause` seconds before the next token.
+        """
+        with self.lock:
+            self._refill()
+            self.rate = max(min_rate, self.rate * factor)
+            self.tokens = min(0.0, 1 - pause * self.rate)
+
+    def recover(self, step=0.05):
+        """Raises the refill rate back towards its configured value after a successful request."""
+        with self.lock:
+            if self.rate < self.max_rate:
+                self._refill()
+                self.rate = min(self.max_rate, self.rate + step * self.max_rate)
+
+
+class SimFinAPIError(Exception):
+    """Raised when a SimFin request fails for good: a client error, or a transient one that outlasted the retries."""
+    def __init__(self, message, status_code=None, endpoint=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.endpoint = endpoint
+
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Transport failures worth retrying: timeouts, dropped connections and truncated or undecodable response bodies
+TRANSIENT_ERRORS = (
+    requests.exceptions.Timeout,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ContentDecodingError,
+)
+
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header (delay in seconds or an HTTP date); returns None if missing or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def compact_to_frame(columns, rows, fields, ticker, output_columns, text_fields=()):
+    """
+    Turns a compact `columns`/`data` payload into a DataFrame with one vectorized conversion per column.
+    `fields` maps output names to an API column, or to a tuple of fallback columns; raises ValueError if none exists.
+    """
+    positions = {}
+    for name, api_names in fields.items():
+        api_names = (api_names,) if isinstance(api_names, str) else api_names
+        positions[name] = [columns.index(api_name) for api_name in api_names if api_name in columns]
+        if not positions[name]:
+            raise ValueError(f"Column {api_names[0]!r} missing from the response")
+    used = sorted({position for field_positions in positions.values() for position in field_positions})
+    raw = pd.DataFrame(rows).reindex(columns=used)  # Short rows come back as NaN and are dropped below
+
+    parsed = {}
+    for name, field_positions in positions.items():
+        values = raw[field_positions[0]]
+        for position in field_positions[1:]:
+            values = values.where(values.notna(), raw[position])
+        if name == "date":
+            parsed[name] = pd.to_datetime(values, errors='coerce').astype("datetime64[ns]")
+        elif name in text_fields:
+            parsed[name] = values
+        else:
+            parsed[name] = pd.to_numeric(values, errors='coerce').astype("float64")
+    if isinstance(ticker, str):
+        parsed["ticker"] = ticker.upper()
+    else:
+        parsed["ticker"] = pd.Series(ticker, index=raw.index, dtype=object).str.upper()
+
+    df = pd.DataFrame(parsed, index=raw.index)[output_columns].dropna()
+    return df.sort_values(by="date", ascending=True)
+
+
+PRICE_FIELDS = {"date": "Date", "close": "Last Closing Price"}
+PRICE_COLUMNS = ['date', 'ticker', 'close']
+# Fundamentals are dated when they became public, so an as-of join never sees a quarter before its filing; the
+# fiscal period end (Report Date) only stands in when SimFin has no publish date
+INCOME_FIELDS = {
+    "date": ("Publish Date", "Report Date"),
+    "fiscal_period": "Fiscal Period",
+    "fiscal_year": "Fiscal Year",
+    "revenue": "Revenue",
+    "net_income": "Net Income",
+}
+INCOME_COLUMNS = ['ticker', 'date', 'fiscal_period', 'fiscal_year', 'revenue', 'net_income']
+BALANCE_FIELDS = {
+    "date": ("Publish Date", "Report Date"),
+    "totalLiabilities": "Total Liabilities",
+    "totalEquity": "Total Equity",
+    "share_capital": "Share Capital & Additional Paid-In Capital",
+}
+BALANCE_COLUMNS = ['date', 'ticker', 'totalLiabilities', 'totalEquity', 'share_capital']
+SHARES_COLUMNS = ['date', 'ticker', 'shares_outstanding']
+
+
+def price_payload(company):
+    """Returns the (columns, rows) of one company entry of a prices/compact response."""
+    return company.get("columns", []), company.get("data", [])
+
+
+def statement_payload(company):
+    """Returns the (columns, rows) of the first statement of one company entry of a statements/compact response."""
+    statements = company.get("statements", [])
+    statement = statements[0] if statements else {}
+    return statement.get("columns", []), statement.get("data", [])
+
+
+def parse_prices(company, ticker):
+    """Parses one company entry of a prices/compact response."""
+    return compact_to_frame(*price_payload(company), PRICE_FIELDS, ticker, PRICE_COLUMNS)
+
+
+def parse_statement(company, ticker, fields, output_columns, text_fields=()):
+    """Parses the first statement of one company entry of a statements/compact response."""
+    return compact_to_frame(*statement_payload(company), fields, ticker, output_columns, text_fields)
+
+
+def parse_shares_outstanding(entries, ticker=None):
+    """
+    Parses the endDate/value entries of a common-shares-outstanding response.
+    Without `ticker`, each entry's own 'ticker' field is used.
+    """
+    raw = pd.DataFrame.from_records(entries, columns=["ticker", "endDate", "value"])
+    df = pd.DataFrame({
+        "date": pd.to_datetime(raw["endDate"], errors='coerce').astype("datetime64[ns]"),
+        "ticker": ticker.upper() if ticker is not None else raw["ticker"].str.upper(),
+        "shares_outstanding": pd.to_numeric(raw["value"], errors='coerce').astype("float64"),
+    }).dropna()
+    return df.sort_values(by="date", ascending=True)
+
 
 class SimFinAPI:
     """
     A simple API wrapper for SimFin v3, handling share prices, income statements, and balance sheets.
     """
-    def __init__(self, api_key):
+    def __init__(self, api_key, cache=None, price_store=None, metrics=None, timeout=(5, 30), max_retries=4,
+                 backoff_base=0.5, backoff_max=30.0, bundle_timeout=60.0):
         self.api_key = api_key
+        self.timeout = timeout  # (connect, read) seconds for every request
+        self.bundle_timeout = bundle_timeout  # Total seconds a fetch_bundle / fetch_bundle_many call may take
+        self.deadline = None  # time.monotonic() after which requests give up; only set on bundle views
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cache = cache  # Optional ResponseCache shared across reruns and users
+        self.price_store = price_store  # Optional PriceStore used for incremental price refreshes
+        self.metrics = metrics if metrics is not None else METRICS  # Request counters and timings
         self.base_url = "https://backend.simfin.com/api/v3/"
         self.headers = {
             "Authorization": f"{self.api_key}",
             "accept": "application/json"
         }
-        self.rate_limit = 0.5  # Respect SimFin's API rate limit (2 requests/sec)
+        self.rate_limiter = TokenBucket(rate=2, capacity=2)  # Respect SimFin's API rate limit (2 requests/sec)
         self.github_base_url = "https://raw.githubusercontent.com/dalmaufc/py_groupproject/main/logos"
 
+        # Keep-alive session so consecutive calls reuse the same TLS connection
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount("https://", adapter)
+
+    def with_metrics(self, metrics):
+        """
+        Returns a view of this client that records into `metrics` but shares its session (and pooled connections),
+        rate limiter, response cache and price store.
+        """
+        view = copy.copy(self)
+        view.metrics = metrics
+        return view
+
     def _respect_rate_limit(self):
-        """Ensures requests comply with SimFin's rate limits."""
-        time.sleep(self.rate_limit)
+        """Ensures requests comply with SimFin's rate limits, waiting only when the budget is used up."""
+        waited = self.rate_limiter.acquire()
+        self.metrics.increment("simfin.rate_limit_wait_s", waited)
+
+    def _backoff(self, attempt, retry_after=None):
+        """Returns the delay before retry number `attempt`: Retry-After if given, else full-jitter exponential."""
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _remaining(self, endpoint):
+        """Returns the seconds left before the deadline (None without one); raises SimFinAPIError once it passed."""
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise SimFinAPIError(f"Request to {endpoint} abandoned: time budget exceeded", endpoint=endpoint)
+        return remaining
+
+    def _sleep(self, seconds, endpoint):
+        """Sleeps before a retry, but never past the deadline."""
+        remaining = self._remaining(endpoint)
+        time.sleep(seconds if remaining is None else min(seconds, remaining))
 
     def _make_request(self, url, params=None):
-        """Handles API requests with rate limiting and error handling."""
-        self._respect_rate_limit()
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()  # Return raw JSON
-        except requests.exceptions.HTTPError as e:
-            print(f"HTTP Error {response.status_code}: {response.text}")
-            return []
-        except Exception as e:
-            print(f"Request error: {e}")
-            return []
+        """Handles API requests with caching, rate limiting, timeouts and retries; raises SimFinAPIError on failure."""
+        endpoint = url[len(self.base_url):] if url.startswith(self.base_url) else url
+        if self.cache is not None:
+            cached = self.cache.get(endpoint, params, self.api_key)
+            if cached is not None:
+                self.metrics.increment("simfin.cache_hits")
+                return cached
+
+        # 429/5xx responses and transient transport errors are retried with jittered backoff (or Retry-After); a 429
+        # also slows the shared rate limiter, and on a bundle view no attempt or wait runs past the bundle's deadline
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.metrics.increment("simfin.retries")
+            self._respect_rate_limit()
+            remaining = self._remaining(endpoint)
+            timeout = self.timeout if remaining is None else tuple(min(t, remaining) for t in self.timeout)
+            try:
+                with self.metrics.timer(f"simfin.request.{endpoint}"):
+                    response = self.session.get(url, params=params, timeout=timeout)
+            except TRANSIENT_ERRORS as e:
+                self.metrics.increment("simfin.errors")
+                if attempt == self.max_retries:
+                    raise SimFinAPIError(f"Request to {endpoint} failed: {e}", endpoint=endpoint) from e
+                self._sleep(self._backoff(attempt), endpoint)
+                continue
+            except requests.exceptions.RequestException as e:  # Invalid URL, too many redirects, ...: not transient
+                self.metrics.increment("simfin.errors")
+                raise SimFinAPIError(f"Request to {endpoint} failed: {e}", endpoint=endpoint) from e
+
+            self.metrics.increment("simfin.requests")
+            self.metrics.increment("simfin.bytes", len(response.content))
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                self.metrics.increment("simfin.errors")
+                delay = self._backoff(attempt, retry_after_seconds(response.headers.get("Retry-After")))
+                if response.status_code == 429:
+                    self.metrics.increment("simfin.throttled")
+                    self.rate_limiter.throttle(pause=delay)  # Every thread waits, not only this one
+                else:
+                    self._sleep(delay, endpoint)
+                continue
+            if response.status_code >= 400:
+                self.metrics.increment("simfin.errors")
+                raise SimFinAPIError(
+                    f"HTTP Error {response.status_code} from {endpoint}: {response.text[:200]}",
+                    status_code=response.status_code, endpoint=endpoint,
+                )
+
+            try:
+                data = response.json()  # Raw JSON
+            except ValueError as e:
+                raise SimFinAPIError(f"Invalid JSON from {endpoint}", response.status_code, endpoint) from e
+            self.rate_limiter.recover()
+            if self.cache is not None and data:
+                self.cache.set(endpoint, params, self.api_key, data)
+            return data
 
     def get_company_logo(self, ticker):
         """Returns the direct GitHub URL for the company's logo."""
@@ -50,25 +327,56 @@ class SimFinAPI:
 
         if not data or not isinstance(data, list) or len(data) == 0:
             print(f"No price data for {ticker} between {start_date} and {end_date}")
-            return pd.DataFrame(columns=['date', 'ticker', 'close'])
+            return pd.DataFrame(columns=PRICE_COLUMNS)
 
-        columns = data[0].get("columns", [])
         try:
-            date_idx = columns.index("Date")
-            close_idx = columns.index("Last Closing Price")
+            return parse_prices(data[0], ticker)
         except ValueError:
             print("Error: Expected columns not found in API response.")
-            return pd.DataFrame(columns=['date', 'ticker', 'close'])
+            return pd.DataFrame(columns=PRICE_COLUMNS)
 
-        processed_data = [
-            {"date": pd.to_datetime(row[date_idx]), "ticker": ticker.upper(), "close": row[close_idx]}
-            for row in data[0].get("data", []) if len(row) > close_idx
-        ]
 
-        df = pd.DataFrame(processed_data).dropna()
-        return df.sort_values(by="date", ascending=True)
+    def get_share_prices_incremental(self, ticker, start_date, end_date):
+        """
+        Fetches daily share prices through the local PriceStore.
+        Only the days from the last stored date onwards (refetched, so corrections replace it) are requested.
+        """
+        if self.price_store is None:
+            return self.get_share_prices(ticker, start_date, end_date)
+
+        stored_df, coverage = self.price_store.load(ticker)
+        if coverage is None or start_date < coverage["start"]:
+            # Nothing usable stored yet: load the whole window once
+            stored_df = self.get_share_prices(ticker, start_date, end_date)
+            coverage_start = start_date
+        elif end_date > coverage["end"]:
+            new_df = self.get_share_prices(ticker, coverage["end"], end_date)
+            merged_df = stored_df
+            if not new_df.empty:
+                merged_df = pd.concat([stored_df, new_df], ignore_index=True).drop_duplicates(subset="date", keep="last")
+                merged_df = merged_df.sort_values(by="date", ignore_index=True)
+            if merged_df.reset_index(drop=True).equals(stored_df.reset_index(drop=True)):
+                # Nothing new or corrected: leave the files alone, a rewrite would evict their PRICE_CACHE entry
+                return self._slice_dates(stored_df, start_date, end_date)
+            stored_df = merged_df
+            coverage_start = coverage["start"]
+        else:
+            # Window already covered, no request needed
+            return self._slice_dates(stored_df, start_date, end_date)
+
+        if not stored_df.empty:
+            last_stored = stored_df["date"].max().strftime("%Y-%m-%d")
+            self.price_store.save(ticker, stored_df, coverage_start, last_stored)
+        return self._slice_dates(stored_df, start_date, end_date)
+
+    @staticmethod
+    def _slice_dates(df, start_date, end_date):
+        """Returns the rows of df whose date lies between start_date and end_date (inclusive)."""
+        if df.empty:
+            return df
+        mask = (df["date"] >= pd.to_datetime(start_date)) & (df["date"] <= pd.to_datetime(end_date))
+        return df[mask].reset_index(drop=True)
 
-    
     def get_income_statement(self, ticker, start_date, end_date):
         """Fetches the income statement data for a ticker."""
         url = f"{self.base_url}companies/statements/compact"
@@ -83,36 +391,13 @@ class SimFinAPI:
 
         if not data or not isinstance(data, list) or len(data) == 0:
             print(f"No income data for {ticker} between {start_date} and {end_date}")
-            return pd.DataFrame(columns=['ticker', 'date', 'fiscal_period', 'fiscal_year', 'revenue', 'net_income'])
+            return pd.DataFrame(columns=INCOME_COLUMNS)
 
-        statements = data[0].get("statements", [])
-        pl_statement = statements[0] if statements else {}
-
-        columns = pl_statement.get("columns", [])
         try:
-            fiscal_period_idx = columns.index("Fiscal Period")
-            fiscal_year_idx = columns.index("Fiscal Year")
-            report_date_idx = columns.index("Report Date")
-            revenue_idx = columns.index("Revenue")
-            net_income_idx = columns.index("Net Income")
+            return parse_statement(data[0], ticker, INCOME_FIELDS, INCOME_COLUMNS, ("fiscal_period", "fiscal_year"))
         except ValueError:
             print("Error: Expected columns not found in API response.")
-            return pd.DataFrame(columns=['ticker', 'date', 'fiscal_period', 'fiscal_year', 'revenue', 'net_income'])
-
-        processed_data = [
-            {
-                "ticker": ticker.upper(),
-                "date": pd.to_datetime(row[report_date_idx], errors='coerce'),
-                "fiscal_period": row[fiscal_period_idx],
-                "fiscal_year": row[fiscal_year_idx],
-                "revenue": pd.to_numeric(row[revenue_idx], errors='coerce'),
-                "net_income": pd.to_numeric(row[net_income_idx], errors='coerce')
-            }
-            for row in pl_statement.get("data", []) if len(row) > max(report_date_idx, revenue_idx, net_income_idx)
-        ]
-
-        df = pd.DataFrame(processed_data).dropna()
-        return df.sort_values(by="date", ascending=True)
+            return pd.DataFrame(columns=INCOME_COLUMNS)
     
     def get_balance_sheet(self, ticker, start_date, end_date):
         """Fetches balance sheet data for a ticker."""
@@ -127,34 +412,13 @@ class SimFinAPI:
 
         if not data or not isinstance(data, list) or len(data) == 0:
             print(f"No balance sheet data for {ticker} between {start_date} and {end_date}")
-            return pd.DataFrame(columns=['ticker', 'date', 'totalLiabilities', 'totalEquity', 'share_capital'])
-
-        statements = data[0].get("statements", [])
-        bs_statement = statements[0] if statements else {}
+            return pd.DataFrame(columns=BALANCE_COLUMNS)
 
-        columns = bs_statement.get("columns", [])
         try:
-            date_idx = columns.index("Report Date")
-            liabilities_idx = columns.index("Total Liabilities")
-            equity_idx = columns.index("Total Equity")
-            share_capital_idx = columns.index("Share Capital & Additional Paid-In Capital")
+            return parse_statement(data[0], ticker, BALANCE_FIELDS, BALANCE_COLUMNS)
         except ValueError:
             print("Error: Expected columns not found in API response.")
-            return pd.DataFrame(columns=['ticker', 'date', 'totalLiabilities', 'totalEquity', 'share_capital'])
-
-        processed_data = [
-            {
-                "date": pd.to_datetime(row[date_idx], errors='coerce'),
-                "ticker": ticker.upper(),
-                "totalLiabilities": pd.to_numeric(row[liabilities_idx], errors='coerce'),
-                "totalEquity": pd.to_numeric(row[equity_idx], errors='coerce'),
-                "share_capital": pd.to_numeric(row[share_capital_idx], errors='coerce')
-            }
-            for row in bs_statement.get("data", []) if len(row) > max(date_idx, liabilities_idx, equity_idx, share_capital_idx)
-        ]
-
-        df = pd.DataFrame(processed_data).dropna()
-        return df.sort_values(by="date", ascending=True)
+            return pd.DataFrame(columns=BALANCE_COLUMNS)
     
     
 
@@ -170,12 +434,159 @@ class SimFinAPI:
 
         if not data or not isinstance(data, list) or len(data) == 0:
             print(f"No shares outstanding data for {ticker} between {start_date} and {end_date}")
-            return pd.DataFrame(columns=['date', 'ticker', 'shares_outstanding'])
+            return pd.DataFrame(columns=SHARES_COLUMNS)
+
+        return parse_shares_outstanding(data, ticker)
 
-        processed_data = [
-            {"date": pd.to_datetime(entry["endDate"]), "ticker": ticker.upper(), "shares_outstanding": entry["value"]}
-            for entry in data
+    def fetch_bundle(self, ticker, start_date, end_date, timeout=None):
+        """
+        Fetches share prices, income statement, balance sheet and shares outstanding concurrently, within timeout.
+        Returns (share_prices_df, income_df, balance_sheet_df, shares_outstanding_df).
+        """
+        bundle = self._bundle_view(timeout)
+        fetchers = [
+            bundle.get_share_prices_incremental,
+            bundle.get_income_statement,
+            bundle.get_balance_sheet,
+            bundle.get_shares_outstanding,
         ]
+        return self._run_bundle(bundle, fetchers, (ticker, start_date, end_date))
+
+    def _bundle_view(self, timeout=None):
+        """Returns a view of this client whose requests all give up timeout seconds from now."""
+        view = copy.copy(self)
+        view.deadline = time.monotonic() + (self.bundle_timeout if timeout is None else timeout)
+        return view
+
+    @staticmethod
+    def _run_bundle(bundle, fetchers, args):
+        """Runs the fetchers concurrently; the first failure or the deadline raises and stops the others."""
+        executor = ThreadPoolExecutor(max_workers=len(fetchers))
+        futures = [executor.submit(fetch, *args) for fetch in fetchers]
+        try:
+            done, pending = wait(futures, timeout=max(0.0, bundle.deadline - time.monotonic()),
+                                 return_when=FIRST_EXCEPTION)
+            for future in futures:
+                if future in done and future.exception() is not None:
+                    raise future.exception()
+            if pending:
+                raise SimFinAPIError("Bundle did not complete within its time budget")
+            return tuple(future.result() for future in futures)
+        finally:
+            bundle.deadline = time.monotonic()  # Fetchers still running stop at their next attempt
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ----- Multi-ticker batch variants -----
+
+    @staticmethod
+    def _chunks(tickers, chunk_size):
+        """Splits a ticker list into upper-cased chunks of at most chunk_size tickers."""
+        tickers = [ticker.upper() for ticker in tickers]
+        return [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+
+    def _get_compact_many(self, url, params, tickers, chunk_size, extract, fields, output_columns, label,
+                          text_fields=()):
+        """
+        Requests a compact endpoint once per chunk of tickers and parses all companies in one compact_to_frame call.
+        Unmatched tickers of a chunk with unnamed companies are requested one by one.
+        """
+        groups = {}  # columns -> (rows, ticker of each row)
+        pending = self._chunks(tickers, chunk_size)
+        while pending:
+            chunk = pending.pop(0)
+            data = self._make_request(url, dict(params, ticker=",".join(chunk)))
+            if not data or not isinstance(data, list):
+                print(f"No {label} data for {', '.join(chunk)}")
+                continue
+            if len(chunk) == 1:
+                companies = [(company.get("ticker") or chunk[0], company) for company in data]
+            else:
+                companies = [(company["ticker"], company) for company in data if company.get("ticker")]
+                if len(companies) < len(data):
+                    matched = {ticker.upper() for ticker, _ in companies}
+                    missing = [ticker for ticker in chunk if ticker not in matched]
+                    print(f"{len(data) - len(companies)} {label} entries without a ticker; "
+                          f"requesting {', '.join(missing)} one by one")
+                    pending.extend([ticker] for ticker in missing)
+            for ticker, company in companies:
+                columns, rows = extract(company)
+                group_rows, group_tickers = groups.setdefault(tuple(columns), ([], []))
+                group_rows.extend(rows)
+                group_tickers.extend([ticker] * len(rows))
 
-        df = pd.DataFrame(processed_data).dropna()
-        return df.sort_values(by="date", ascending=True)
+        frames = []
+        for columns, (rows, row_tickers) in groups.items():
+            try:
+                frames.append(compact_to_frame(list(columns), rows, fields, row_tickers, output_columns, text_fields))
+            except ValueError:
+                print("Error: Expected columns not found in API response.")
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=output_columns)
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values(by=["ticker", "date"], ascending=True, ignore_index=True)
+
+    def get_share_prices_many(self, tickers, start_date, end_date, chunk_size=10):
+        """Fetches daily share prices for several tickers with one request per chunk of tickers."""
+        return self._get_compact_many(
+            f"{self.base_url}companies/prices/compact",
+            {"start": start_date, "end": end_date},
+            tickers, chunk_size, price_payload, PRICE_FIELDS, PRICE_COLUMNS, "price",
+        )
+
+    def get_income_statement_many(self, tickers, start_date, end_date, chunk_size=10):
+        """Fetches quarterly income statements for several tickers with one request per chunk of tickers."""
+        return self._get_compact_many(
+            f"{self.base_url}companies/statements/compact",
+            {"statements": "PL", "period": "Q1,Q2,Q3,Q4", "start": start_date, "end": end_date},
+            tickers, chunk_size, statement_payload, INCOME_FIELDS, INCOME_COLUMNS, "income",
+            text_fields=("fiscal_period", "fiscal_year"),
+        )
+
+    def get_balance_sheet_many(self, tickers, start_date, end_date, chunk_size=10):
+        """Fetches balance sheets for several tickers with one request per chunk of tickers."""
+        return self._get_compact_many(
+            f"{self.base_url}companies/statements/compact",
+            {"statements": "BS", "start": start_date, "end": end_date},
+            tickers, chunk_size, statement_payload, BALANCE_FIELDS, BALANCE_COLUMNS, "balance sheet",
+        )
+
+    def get_shares_outstanding_many(self, tickers, start_date, end_date, chunk_size=10):
+        """
+        Fetches common shares outstanding for several tickers with one request per chunk of tickers.
+        Chunks whose entries carry no 'ticker' field fall back to one request per ticker.
+        """
+        url = f"{self.base_url}companies/common-shares-outstanding"
+        frames = []
+        for chunk in self._chunks(tickers, chunk_size):
+            data = self._make_request(url, {"ticker": ",".join(chunk), "start": start_date, "end": end_date})
+            if not data or not isinstance(data, list):
+                print(f"No shares outstanding data for {', '.join(chunk)}")
+                continue
+            if len(chunk) == 1:
+                frames.append(parse_shares_outstanding(data, chunk[0]))
+            elif all("ticker" in entry for entry in data):
+                frames.append(parse_shares_outstanding(data))
+            else:
+                frames.extend(self.get_shares_outstanding(ticker, start_date, end_date) for ticker in chunk)
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=SHARES_COLUMNS)
+        df = pd.concat(frames, ignore_index=True)
+        return df.sort_values(by=["ticker", "date"], ascending=True, ignore_index=True)
+
+    def fetch_bundle_many(self, tickers, start_date, end_date, chunk_size=10, timeout=None):
+        """
+        Batch version of fetch_bundle, with one request per endpoint and chunk of tickers.
+        Returns (share_prices_df, income_df, balance_sheet_df, shares_outstanding_df) in long format.
+        """
+        bundle = self._bundle_view(timeout)
+        fetchers = [
+            bundle.get_share_prices_many,
+            bundle.get_income_statement_many,
+            bundle.get_balance_sheet_many,
+            bundle.get_shares_outstanding_many,
+        ]
+        return self._run_bundle(bundle, fetchers, (tickers, start_date, end_date, chunk_size))
@@ -0,0 +1,354 @@
+"""
+Benchmark suite for the SimFinAPI parsers, the feature pipeline and model inference.
+
+SimFin responses are replayed from a synthetic JSON fixture in test_code/fixtures (data in the shape of SimFin v3
+responses, not a recording) through a mocked requests transport, so no API key or network access is needed. Each
+benchmark runs at several data sizes and the timings are written to a JSON file that can be compared against an
+earlier run. The cold-start cost of the stock page's imports is measured in fresh interpreters with -X importtime:
+
+    python test_code/benchmarks.py --output bench.json
+    python test_code/benchmarks.py --output new.json --baseline bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import features  # noqa: E402
+import model_registry  # noqa: E402
+import signals  # noqa: E402
+from simfin_api import SimFinAPI, TokenBucket  # noqa: E402
+
+FIXTURE_PATH = os.path.join(ROOT, "test_code", "fixtures", "simfin_synthetic_2024.json")
+MODEL_PATH = os.path.join(ROOT, "mag7_final_model.json")
+MAG7 = ['AAPL', 'MSFT', 'GOOG', 'AMZN', 'NVDA', 'META', 'TSLA']
+
+# (label, number of tickers, number of years)
+SIZES = [
+    ("1t-1y", 1, 1),
+    ("1t-10y", 1, 10),
+    ("7t-10y", 7, 10),
+    ("500t-1y", 500, 1),
+]
+
+# Modules imported by pages/Choose_a_Stock.py before and after its API-key gate
+STARTUP_IMPORTS = {
+    "startup.before_gate": ["streamlit"],
+    "startup.after_gate": [
+        "pandas", "simfin_api", "response_cache", "price_store", "model_registry", "signals", "features",
+        "scheduler", "instrumentation", "charts",
+    ],
+}
+
+
+def make_tickers(count):
+    """Returns the Mag 7 tickers followed by synthetic ones up to count."""
+    return (MAG7 + [f"T{i:03d}" for i in range(max(0, count - len(MAG7)))])[:count]
+
+
+class FixtureTransport(HTTPAdapter):
+    """
+    requests transport adapter that answers SimFin v3 calls from the synthetic fixture.
+    The fixture covers one ticker and one year; it is replicated for every requested ticker and for `years` years
+    (shifting the dates back one year per copy). Encoded payloads are cached so repeats only time the client side.
+    """
+    def __init__(self, fixture, years):
+        super().__init__()
+        self.fixture = fixture
+        self.years = years
+        self.payloads = {}
+
+    def _shift_rows(self, rows, date_positions):
+        """Returns the fixture rows repeated once per year, with their dates moved back by whole years."""
+        shifted = []
+        for offset in range(self.years - 1, -1, -1):
+            for row in rows:
+                row = list(row)
+                for position in date_positions:
+                    if row[position]:
+                        row[position] = str(int(row[position][:4]) - offset) + row[position][4:]
+                shifted.append(row)
+        return shifted
+
+    def _company(self, template, ticker, rows_key="data"):
+        """Copies one company entry of the fixture for another ticker and the configured number of years."""
+        company = dict(template, ticker=ticker)
+        if "statements" in template:
+            statement = dict(template["statements"][0])
+            dates = [i for i, name in enumerate(statement["columns"]) if name in ("Report Date", "Publish Date")]
+            statement["data"] = self._shift_rows(statement["data"], dates)
+            company["statements"] = [statement]
+        else:
+            company[rows_key] = self._shift_rows(template[rows_key], [template["columns"].index("Date")])
+        return company
+
+    def build_payload(self, path, params):
+        """Builds the JSON payload SimFin would return for the endpoint and params."""
+        tickers = params["ticker"][0].split(",")
+        if path.endswith("companies/prices/compact"):
+            return [self._company(self.fixture["prices"][0], ticker) for ticker in tickers]
+        if path.endswith("companies/statements/compact"):
+            template = self.fixture[params["statements"][0]][0]
+            return [self._company(template, ticker) for ticker in tickers]
+        if path.endswith("companies/common-shares-outstanding"):
+            entries = []
+            for ticker in tickers:
+                for offset in range(self.years - 1, -1, -1):
+                    for entry in self.fixture["shares"]:
+                        end_date = str(int(entry["endDate"][:4]) - offset) + entry["endDate"][4:]
+                        entries.append(dict(entry, endDate=end_date, ticker=ticker))
+            return entries
+        raise ValueError(f"No fixture for {path}")
+
+    def send(self, request, **kwargs):
+        url = urlparse(request.url)
+        key = (url.path, url.query)
+        if key not in self.payloads:
+            self.payloads[key] = json.dumps(self.build_payload(url.path, parse_qs(url.query))).encode("utf-8")
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.payloads[key]
+        response.headers["Content-Type"] = "application/json"
+        response.url = request.url
+        response.request = request
+        return response
+
+
+def make_api(fixture, years):
+    """Returns a SimFinAPI whose session is served by FixtureTransport and whose rate limiter never waits."""
+    api = SimFinAPI(api_key="benchmark")
+    api.rate_limiter = TokenBucket(rate=1e9, capacity=1e9)
+    api.session.mount("https://", FixtureTransport(fixture, years))
+    return api
+
+
+def measure(fn, repeats, setup=None):
+    """Runs fn `repeats` times (calling setup before each run, untimed) and returns the timings in seconds."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def record(results, name, size, timings, rows=None):
+    """Appends one benchmark result and prints it."""
+    entry = {
+        "name": name,
+        "size": size,
+        "median_s": statistics.median(timings),
+        "min_s": min(timings),
+        "repeats": len(timings),
+        "rows": rows,
+    }
+    results.append(entry)
+    print(f"{name:<32} {size:<8} median {entry['median_s'] * 1000:9.2f} ms   min {entry['min_s'] * 1000:9.2f} ms"
+          + (f"   rows {rows}" if rows is not None else ""))
+
+
+def run_size(results, memory, fixture, label, n_tickers, years, repeats):
+    """Runs the parser, feature and prediction benchmarks for one data size, recording feature frame memory."""
+    api = make_api(fixture, years)
+    tickers = make_tickers(n_tickers)
+    start_date, end_date = f"{2025 - years}-01-01", "2024-12-31"
+
+    if n_tickers == 1:
+        fetchers = {
+            "parse.share_prices": lambda: api.get_share_prices(tickers[0], start_date, end_date),
+            "parse.income_statement": lambda: api.get_income_statement(tickers[0], start_date, end_date),
+            "parse.balance_sheet": lambda: api.get_balance_sheet(tickers[0], start_date, end_date),
+            "parse.shares_outstanding": lambda: api.get_shares_outstanding(tickers[0], start_date, end_date),
+        }
+    else:
+        chunk = max(n_tickers, 1)
+        fetchers = {
+            "parse.share_prices": lambda: api.get_share_prices_many(tickers, start_date, end_date, chunk),
+            "parse.income_statement": lambda: api.get_income_statement_many(tickers, start_date, end_date, chunk),
+            "parse.balance_sheet": lambda: api.get_balance_sheet_many(tickers, start_date, end_date, chunk),
+            "parse.shares_outstanding": lambda: api.get_shares_outstanding_many(tickers, start_date, end_date, chunk),
+        }
+
+    frames = []
+    for name, fetch in fetchers.items():
+        fetch()  # Warm-up: builds and caches the fixture payload outside the timing
+        timings, df = measure(fetch, repeats)
+        record(results, name, label, timings, len(df))
+        frames.append(df)
+
+    timings, merged_df = measure(lambda: features.build_features(*frames), repeats, setup=features.FEATURE_CACHE.clear)
+    record(results, "features.build_features", label, timings, len(merged_df))
+    timings, _ = measure(lambda: features.build_features(*frames), repeats)
+    record(results, "features.build_features.memo_hit", label, timings, len(merged_df))
+    timings, compact_df = measure(
+        lambda: features.build_features(*frames, compact=True), repeats, setup=features.FEATURE_CACHE.clear
+    )
+    record(results, "features.build_features.compact", label, timings, len(compact_df))
+    memory[label] = {
+        "full_bytes": int(merged_df.memory_usage(deep=True).sum()),
+        "compact_bytes": int(compact_df.memory_usage(deep=True).sum()),
+    }
+    print(f"{'memory.features':<32} {label:<8} {memory[label]['full_bytes'] / 1e6:9.2f} MB -> "
+          f"{memory[label]['compact_bytes'] / 1e6:.2f} MB compacted")
+
+    predictor = model_registry.load_predictor(MODEL_PATH)
+    booster = model_registry.load_model(MODEL_PATH)
+    X = merged_df[features.FEATURE_COLUMNS]
+    timings, _ = measure(lambda: predictor.predict(X), repeats)
+    record(results, "predict.tree_predictor", label, timings, len(X))
+
+    import xgboost as xgb
+    timings, _ = measure(lambda: booster.predict(xgb.DMatrix(X)), repeats)
+    record(results, "predict.booster", label, timings, len(X))
+    timings, _ = measure(lambda: signals.predict_signals(predictor, merged_df), repeats)
+    record(results, "predict.predict_signals", label, timings, len(X))
+
+    check_parity(predictor, booster, X)
+
+
+def check_parity(predictor, booster, X, nan_fraction=0.05, tolerance=1e-6, seed=0):
+    """
+    Asserts that the TreePredictor gives the same probabilities as Booster.predict, on X as it is and with a share
+    of the values replaced by NaN so the missing-value branches are exercised too.
+    """
+    import xgboost as xgb
+
+    values = X.to_numpy(dtype=np.float32)
+    with_nan = values.copy()
+    with_nan[np.random.default_rng(seed).random(values.shape) < nan_fraction] = np.nan
+    for name, matrix in (("inputs", values), ("inputs with NaN", with_nan)):
+        expected = booster.predict(xgb.DMatrix(matrix, feature_names=list(X.columns)))
+        np.testing.assert_allclose(
+            predictor.predict(matrix), expected, rtol=0, atol=tolerance,
+            err_msg=f"TreePredictor differs from Booster.predict on {name}",
+        )
+
+
+def run_model_load(results, repeats):
+    """Times parsing the model file into a Booster and compiling it into a TreePredictor."""
+    timings, _ = measure(lambda: model_registry.load_model(MODEL_PATH), repeats, setup=model_registry.clear_models)
+    record(results, "model.load_booster", "-", timings)
+    timings, _ = measure(lambda: model_registry.load_predictor(MODEL_PATH), repeats, setup=model_registry.clear_models)
+    record(results, "model.compile_predictor", "-", timings)
+    timings, _ = measure(lambda: model_registry.load_predictor(MODEL_PATH), repeats)
+    record(results, "model.load_predictor.cached", "-", timings)
+
+
+def import_profile(modules):
+    """
+    Imports modules in a fresh interpreter with -X importtime. Returns the wall time in seconds and the
+    top-level imports as {module: (self_us, cumulative_us)}.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise ImportError(proc.stderr.strip().splitlines()[-1])
+
+    imports = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not name[1:].startswith(" "):  # Nested imports are indented below their parent
+            imports[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall, imports
+
+
+def run_startup(results, profile, repeats, top=10):
+    """Times importing the page's dependencies from a cold interpreter and keeps the slowest top-level imports."""
+    for name, modules in STARTUP_IMPORTS.items():
+        try:
+            runs = [import_profile(modules) for _ in range(repeats)]
+        except ImportError as e:
+            print(f"{name:<32} skipped ({e})")
+            continue
+        record(results, name, "-", [wall for wall, _ in runs])
+        slowest = sorted(runs[-1][1].items(), key=lambda item: item[1][1], reverse=True)[:top]
+        profile[name] = [
+            {"module": module, "self_us": self_us, "cumulative_us": cumulative_us}
+            for module, (self_us, cumulative_us) in slowest
+        ]
+
+
+def compare(results, baseline_path, tolerance):
+    """Prints the ratio to a previous run for every benchmark and returns the names of regressions."""
+    with open(baseline_path) as f:
+        baseline = {(entry["name"], entry["size"]): entry for entry in json.load(f)["results"]}
+    regressions = []
+    print(f"\nComparison with {baseline_path} (tolerance {tolerance:.0%}):")
+    for entry in results:
+        previous = baseline.get((entry["name"], entry["size"]))
+        if previous is None or previous["median_s"] == 0:
+            continue
+        ratio = entry["median_s"] / previous["median_s"]
+        flag = "REGRESSION" if ratio > 1 + tolerance else ""
+        print(f"{entry['name']:<32} {entry['size']:<8} x{ratio:6.2f} {flag}")
+        if flag:
+            regressions.append(f"{entry['name']}@{entry['size']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SimFinAPI parsing, the feature pipeline and inference.")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", default=None, help="Earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging a regression")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--sizes", nargs="*", default=[label for label, _, _ in SIZES],
+                        help="Subset of sizes to run: " + ", ".join(label for label, _, _ in SIZES))
+    args = parser.parse_args()
+
+    with open(FIXTURE_PATH) as f:
+        fixture = json.load(f)
+
+    results = []
+    startup = {}
+    memory = {}
+    run_startup(results, startup, args.repeats)
+    run_model_load(results, args.repeats)
+    for label, n_tickers, years in SIZES:
+        if label in args.sizes:
+            run_size(results, memory, fixture, label, n_tickers, years, args.repeats)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "startup": startup,
+        "memory": memory,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("Regressions: " + ", ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
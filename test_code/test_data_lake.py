@@ -0,0 +1,50 @@
+"""
+Offline checks of the Parquet data lake on a small bulk ZIP written to a temporary directory.
+Run directly with `python test_code/test_data_lake.py`, or through pytest.
+"""
+import os
+import sys
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_lake import ingest_bulk_zip, read_dataset  # noqa: E402
+
+
+def write_bulk_zip(path, member, lines):
+    """Writes one semicolon-separated CSV member into a ZIP, like the SimFin bulk download."""
+    with zipfile.ZipFile(path, "w") as zip_ref:
+        zip_ref.writestr(member, "\n".join(lines) + "\n")
+
+
+def test_chunks_with_different_dtypes():
+    """
+    Chunks that pandas infers differently (int then float close, an empty then filled dividend, a text column
+    that is empty in the first chunk) land in one schema and read back together.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        zip_path = os.path.join(directory, "bulk.zip")
+        lake_dir = os.path.join(directory, "lake")
+        lines = ["Ticker;SimFinId;Date;Close;Dividend;Currency"]
+        lines += [f"AAPL;1;2024-01-{day:02d};{100 + day};;" for day in range(1, 11)]
+        lines += [f"AAPL;1;2024-02-{day:02d};{200.5 + day};0.24;USD" for day in range(1, 11)]
+        write_bulk_zip(zip_path, "us-shareprices-daily.csv", lines)
+
+        ingest_bulk_zip(zip_path, lake_dir, members=["us-shareprices-daily.csv"], chunksize=10)
+        df = read_dataset("shareprices_daily", lake_dir=lake_dir).sort_values("Date", ignore_index=True)
+
+        assert len(df) == 20
+        assert str(df["Close"].dtype) == "float64"
+        assert df["Close"].iloc[0] == 101.0 and df["Close"].iloc[-1] == 210.5
+        assert df["Dividend"].iloc[:10].isna().all() and (df["Dividend"].iloc[10:] == 0.24).all()
+        assert df["Currency"].iloc[:10].isna().all() and (df["Currency"].iloc[10:] == "USD").all()
+
+        january = read_dataset("shareprices_daily", tickers=["AAPL"], columns=["Date", "Close"],
+                               end="2024-01-31", lake_dir=lake_dir)
+        assert len(january) == 10
+
+
+if __name__ == "__main__":
+    test_chunks_with_different_dtypes()
+    print("✅ Data lake checks passed")
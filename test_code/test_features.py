@@ -0,0 +1,84 @@
+"""
+Offline checks of the feature pipeline on small hand-built frames (no API key needed).
+Run directly with `python test_code/test_features.py`, or through pytest.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features import asof_join, build_features, expand_frame  # noqa: E402
+from simfin_api import BALANCE_COLUMNS, INCOME_COLUMNS, SHARES_COLUMNS  # noqa: E402
+
+
+def make_prices():
+    """Four trading days for AAPL and MSFT."""
+    dates = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"])
+    return pd.DataFrame({
+        "date": list(dates) * 2,
+        "ticker": ["AAPL"] * 4 + ["MSFT"] * 4,
+        "close": [10.0, 11.0, 12.0, 13.0, 100.0, 101.0, 102.0, 103.0],
+    })
+
+
+def test_asof_join_empty_and_unknown_tickers():
+    """Empty fundamentals, or fundamentals only for unpriced tickers, leave NaN columns instead of failing."""
+    prices = make_prices()
+    empty_shares = pd.DataFrame(columns=SHARES_COLUMNS)
+    unknown_shares = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01"]), "ticker": ["GOOG"], "shares_outstanding": [5.0],
+    })
+    for shares in (empty_shares, unknown_shares):
+        merged = asof_join(prices, shares)
+        assert len(merged) == len(prices)
+        assert merged["shares_outstanding"].isna().all()
+
+
+def test_build_features_values():
+    """
+    P/E is close * shares / net income as of each day, the SMA starts from the first close (min_periods=1) and
+    next_close is the ticker's own next close: nothing leaks across tickers. MSFT reports only on Jan 3, so its
+    Jan 2 row has no P/E and is dropped, while its SMA still starts from that close. The compact path yields the same values in float32.
+    """
+    prices = make_prices()
+    income = pd.DataFrame({
+        "ticker": ["AAPL", "AAPL", "MSFT"],
+        "date": pd.to_datetime(["2024-01-01", "2024-01-04", "2024-01-03"]),
+        "fiscal_period": ["Q4", "Q1", "Q4"],
+        "fiscal_year": [2023, 2024, 2023],
+        "revenue": [1000.0, 1100.0, 5000.0],
+        "net_income": [100.0, 200.0, 1000.0],
+    })[INCOME_COLUMNS]
+    balance_sheet = pd.DataFrame(columns=BALANCE_COLUMNS)
+    shares = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-01"]),
+        "ticker": ["AAPL", "MSFT"],
+        "shares_outstanding": [10.0, 5.0],
+    })
+    expected = pd.DataFrame({
+        "ticker": ["AAPL"] * 4 + ["MSFT"] * 3,
+        "date": pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]
+                               + ["2024-01-03", "2024-01-04", "2024-01-05"]),
+        "p_e_ratio": [1.0, 1.1, 0.6, 0.65, 0.505, 0.51, 0.515],
+        "sma_2": [10.0, 10.5, 11.5, 12.5, 100.5, 101.5, 102.5],
+        "next_close": [11.0, 12.0, 13.0, np.nan, 102.0, 103.0, np.nan],
+    })
+
+    for compact in (False, True):
+        features = build_features(prices, income, balance_sheet, shares, sma_window=2, compact=compact)
+        if compact:
+            features = expand_frame(features)
+        features = features.reset_index(drop=True)
+        assert features["ticker"].tolist() == expected["ticker"].tolist()
+        assert (features["date"] == expected["date"]).all()
+        for name in ("p_e_ratio", "sma_2", "next_close"):
+            np.testing.assert_allclose(features[name].astype(float), expected[name], rtol=1e-6, err_msg=name)
+
+
+if __name__ == "__main__":
+    test_asof_join_empty_and_unknown_tickers()
+    test_build_features_values()
+    print("✅ Feature pipeline checks passed")
@@ -1,6 +1,6 @@
 import requests
-import pandas as pd
 from simfin_api import SimFinAPI
+from features import build_features
 
 # Initialize SimFin API (Replace with your valid API key)
 api = SimFinAPI(api_key="e")
@@ -30,34 +30,11 @@ print("🔍 Testing Shares Outstanding API...")
 shares_outstanding_df = api.get_shares_outstanding(ticker, start_date, end_date)
 print(shares_outstanding_df.head())
 
-# Convert date columns to datetime format for proper merging
-share_prices_df["date"] = pd.to_datetime(share_prices_df["date"])
-income_df["date"] = pd.to_datetime(income_df["date"])
-balance_sheet_df["date"] = pd.to_datetime(balance_sheet_df["date"])
+# Merge datasets and compute market cap, P/E, SMA 50 and next_close with the shared feature pipeline
+merged_df = build_features(share_prices_df, income_df, balance_sheet_df, shares_outstanding_df)
 
-# Merge datasets using a left join on ticker and date
-merged_df = share_prices_df.merge(income_df, on=["ticker", "date"], how="left")
-merged_df = merged_df.merge(balance_sheet_df, on=["ticker", "date"], how="left")
-merged_df = merged_df.merge(shares_outstanding_df, on=["ticker", "date"], how="left")
-
-# Sort by ticker and date (most recent to oldest)
-merged_df = merged_df.sort_values(by=["ticker", "date"], ascending=[True, True])
-
-# Forward-fill missing values for financial data
-merged_df.ffill(inplace=True)
-
-# Compute P/E ratio
-merged_df["market_capitalization"] = merged_df["close"] * merged_df["shares_outstanding"]
-merged_df["p_e_ratio"] = merged_df["market_capitalization"] / merged_df["net_income"]
-
-# Compute 50-day Simple Moving Average (SMA)
-merged_df["sma_50"] = merged_df.groupby("ticker")["close"].transform(lambda x: x.rolling(window=50, min_periods=1).mean())
-
-# Add next day's close price as a target variable
-merged_df["next_close"] = merged_df.groupby("ticker")["close"].shift(-1)
-
-# Drop rows where critical features contain NaN values
-merged_df = merged_df.dropna(subset=["close", "p_e_ratio", "sma_50"])
+# Running it again on unchanged inputs is served from the memo
+assert build_features(share_prices_df, income_df, balance_sheet_df, shares_outstanding_df).equals(merged_df)
 
 # Save merged data for further inspection
 merged_df.to_csv("merged_debug_output.csv", index=False)
@@ -0,0 +1,74 @@
+"""
+Offline checks of the SQLite response cache: price expiry around the close and LRU eviction by size.
+Run directly with `python test_code/test_response_cache.py`, or through pytest.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import MARKET_TZ, ResponseCache  # noqa: E402
+
+PRICES = "companies/prices/compact"
+STATEMENTS = "companies/statements/compact"
+
+
+def prices_until(last_date):
+    """A prices/compact response whose last row is dated last_date."""
+    return [{"columns": ["Date", "Last Closing Price"], "data": [["2024-01-02", 10.0], [last_date, 11.0]]}]
+
+
+def test_price_ttl_waits_for_publication():
+    """Prices fetched just after the close expire once the session is published, not at the next close."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(os.path.join(directory, "responses.sqlite"), publish_delay_minutes=30)
+        tuesday = datetime(2024, 3, 19, 16, 5, tzinfo=MARKET_TZ)
+        friday = datetime(2024, 3, 22, 16, 35, tzinfo=MARKET_TZ)
+        assert cache.ttl_for(PRICES, tuesday) == 25 * 60
+        assert cache.ttl_for(PRICES, friday) == (3 * 24 * 60 - 5) * 60  # Monday 16:30
+        assert cache.ttl_for(STATEMENTS, tuesday) == 3 * 24 * 3600
+
+        # On Friday after publication, a response that stops at Thursday is still waiting for Friday's session
+        assert cache.awaits_session(PRICES, {"end": "2024-03-22"}, prices_until("2024-03-21"), friday)
+        assert not cache.awaits_session(PRICES, {"end": "2024-03-22"}, prices_until("2024-03-22"), friday)
+        assert not cache.awaits_session(PRICES, {"end": "2024-02-01"}, prices_until("2024-02-01"), friday)
+        assert not cache.awaits_session(STATEMENTS, {}, [], friday)
+
+
+def test_incomplete_prices_are_not_stored():
+    """A price response that ends before the last session is not cached; historical windows are."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResponseCache(os.path.join(directory, "responses.sqlite"))
+        current = {"ticker": "AAPL", "start": "2020-01-01", "end": "2999-12-31"}
+        historical = {"ticker": "AAPL", "start": "2020-01-01", "end": "2020-12-31"}
+        cache.set(PRICES, current, "key", prices_until("2020-12-31"))
+        cache.set(PRICES, historical, "key", prices_until("2020-12-31"))
+        assert cache.get(PRICES, current, "key") is None
+        assert cache.get(PRICES, historical, "key") == prices_until("2020-12-31")
+
+
+def test_lru_eviction_by_size():
+    """Over max_bytes, the least recently read entries are dropped first."""
+    with tempfile.TemporaryDirectory() as directory:
+        payload = ["x" * 100]
+        cache = ResponseCache(os.path.join(directory, "responses.sqlite"), max_bytes=350)
+        for ticker in ("A", "B", "C"):
+            cache.set(STATEMENTS, {"ticker": ticker}, "key", payload)
+        assert cache.get(STATEMENTS, {"ticker": "A"}, "key") == payload  # A is now the most recent
+        cache.set(STATEMENTS, {"ticker": "D"}, "key", payload)
+
+        assert cache.get(STATEMENTS, {"ticker": "B"}, "key") is None
+        for ticker in ("A", "C", "D"):
+            assert cache.get(STATEMENTS, {"ticker": ticker}, "key") == payload
+        stats = cache.stats()
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 3 and stats["bytes"] <= 350
+
+
+if __name__ == "__main__":
+    test_price_ttl_waits_for_publication()
+    test_incomplete_prices_are_not_stored()
+    test_lru_eviction_by_size()
+    print("✅ Response cache checks passed")
@@ -0,0 +1,222 @@
+"""
+Offline checks of SimFinAPI's error handling against a scripted transport (no API key or network needed).
+Run directly with `python test_code/test_simfin_api.py`, or through pytest.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_cache import FrameCache  # noqa: E402
+from instrumentation import Metrics  # noqa: E402
+from price_store import PriceStore  # noqa: E402
+from simfin_api import INCOME_COLUMNS, INCOME_FIELDS, SimFinAPI, SimFinAPIError, parse_statement  # noqa: E402
+
+
+class ScriptedTransport(HTTPAdapter):
+    """
+    Transport adapter that answers each endpoint from a list of outcomes: an exception instance is raised, a
+    number of seconds is slept before answering, anything else is returned as the JSON body.
+    The last outcome of an endpoint repeats once the list is used up. The query params of every request are kept.
+    """
+    def __init__(self, script):
+        super().__init__()
+        self.script = {endpoint: list(outcomes) for endpoint, outcomes in script.items()}
+        self.calls = {}
+        self.params = []
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        endpoint = next(name for name in self.script if f"/api/v3/{name}?" in request.url)
+        with self.lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            self.params.append({name: values[0] for name, values in parse_qs(urlparse(request.url).query).items()})
+            outcomes = self.script[endpoint]
+            outcome = outcomes.pop(0) if len(outcomes) > 1 else outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        if isinstance(outcome, float):
+            time.sleep(outcome)
+            outcome = []
+        response = requests.Response()
+        response.status_code = 200
+        response._content = requests.compat.json.dumps(outcome).encode()
+        response.request = request
+        return response
+
+
+def make_api(script, **kwargs):
+    """Returns a client whose requests are answered by a ScriptedTransport, without backoff delays."""
+    api = SimFinAPI(api_key="test", metrics=Metrics(), backoff_base=0.0, **kwargs)
+    api.rate_limiter.rate = api.rate_limiter.max_rate = 1000  # No rate limiting in tests
+    api.rate_limiter.capacity = api.rate_limiter.tokens = 1000
+    transport = ScriptedTransport(script)
+    api.session.mount("https://", transport)
+    return api, transport
+
+
+def test_truncated_bodies_are_retried():
+    """ChunkedEncodingError and ContentDecodingError are retried like timeouts."""
+    api, transport = make_api({
+        "companies/common-shares-outstanding": [
+            requests.exceptions.ChunkedEncodingError("truncated"),
+            requests.exceptions.ContentDecodingError("bad gzip"),
+            [],
+        ],
+    })
+    shares = api.get_shares_outstanding("AAPL", "2024-01-01", "2024-12-31")
+    assert shares.empty
+    assert transport.calls["companies/common-shares-outstanding"] == 3
+
+
+def test_transport_failures_raise_simfin_api_error():
+    """Retries running out, and non-transient transport errors, surface as SimFinAPIError."""
+    api, transport = make_api({
+        "companies/common-shares-outstanding": [requests.exceptions.ChunkedEncodingError("truncated")],
+        "companies/statements/compact": [requests.exceptions.TooManyRedirects("loop")],
+    }, max_retries=2)
+    for fetch, endpoint, attempts in (
+        (api.get_shares_outstanding, "companies/common-shares-outstanding", 3),
+        (api.get_income_statement, "companies/statements/compact", 1),
+    ):
+        try:
+            fetch("AAPL", "2024-01-01", "2024-12-31")
+        except SimFinAPIError:
+            pass
+        else:
+            raise AssertionError(f"{endpoint} did not raise SimFinAPIError")
+        assert transport.calls[endpoint] == attempts
+
+
+def test_fetch_bundle_fails_fast():
+    """The first failing fetcher ends the bundle without waiting for its slow siblings."""
+    api, _ = make_api({
+        "companies/prices/compact": [2.0],
+        "companies/statements/compact": [2.0],
+        "companies/common-shares-outstanding": [requests.exceptions.TooManyRedirects("loop")],
+    })
+    start = time.monotonic()
+    try:
+        api.fetch_bundle("AAPL", "2024-01-01", "2024-12-31")
+    except SimFinAPIError:
+        pass
+    else:
+        raise AssertionError("fetch_bundle did not raise SimFinAPIError")
+    assert time.monotonic() - start < 1.0
+
+
+def test_fetch_bundle_time_budget():
+    """A bundle whose requests all hang gives up after its timeout."""
+    api, _ = make_api({
+        "companies/prices/compact": [2.0],
+        "companies/statements/compact": [2.0],
+        "companies/common-shares-outstanding": [2.0],
+    })
+    start = time.monotonic()
+    try:
+        api.fetch_bundle("AAPL", "2024-01-01", "2024-12-31", timeout=0.2)
+    except SimFinAPIError:
+        pass
+    else:
+        raise AssertionError("fetch_bundle did not raise SimFinAPIError")
+    assert time.monotonic() - start < 1.0
+
+
+def test_statements_dated_by_publish_date():
+    """Statements are dated when they were published; the report date only fills a missing publish date."""
+    columns = ["Fiscal Period", "Fiscal Year", "Report Date", "Publish Date", "Revenue", "Net Income"]
+    company = {"ticker": "AAPL", "statements": [{"columns": columns, "data": [
+        ["Q4", 2023, "2023-12-30", "2024-02-02", 1000.0, 100.0],
+        ["Q1", 2024, "2024-03-30", None, 1100.0, 110.0],
+    ]}]}
+    income = parse_statement(company, "AAPL", INCOME_FIELDS, INCOME_COLUMNS, ("fiscal_period", "fiscal_year"))
+    assert [str(date.date()) for date in income["date"]] == ["2024-02-02", "2024-03-30"]
+
+    without_publish_date = {"ticker": "AAPL", "statements": [{
+        "columns": [name for name in columns if name != "Publish Date"],
+        "data": [["Q4", 2023, "2023-12-30", 1000.0, 100.0]],
+    }]}
+    income = parse_statement(without_publish_date, "AAPL", INCOME_FIELDS, INCOME_COLUMNS,
+                             ("fiscal_period", "fiscal_year"))
+    assert str(income["date"].iloc[0].date()) == "2023-12-30"
+
+
+def test_companies_without_ticker_are_requested_again():
+    """An unnamed company in a batch response is never matched by position; its chunk's leftovers go one by one."""
+    columns = ["Date", "Last Closing Price"]
+    api, transport = make_api({
+        "companies/prices/compact": [
+            [
+                {"ticker": "AAPL", "columns": columns, "data": [["2024-01-02", 185.0]]},
+                {"columns": columns, "data": [["2024-01-02", 140.0]]},  # GOOG; MSFT left out
+            ],
+            [],  # MSFT on its own: no data
+            [{"columns": columns, "data": [["2024-01-02", 140.0]]}],  # GOOG on its own
+        ],
+    })
+    prices = api.get_share_prices_many(["AAPL", "MSFT", "GOOG"], "2024-01-01", "2024-01-31")
+    assert prices["ticker"].tolist() == ["AAPL", "GOOG"]
+    assert prices["close"].tolist() == [185.0, 140.0]
+    assert transport.calls["companies/prices/compact"] == 3
+
+
+def prices(*rows):
+    """A prices/compact response for AAPL with (date, close) rows."""
+    return [{"ticker": "AAPL", "columns": ["Date", "Last Closing Price"], "data": [list(row) for row in rows]}]
+
+
+def test_incremental_prices():
+    """
+    The first load fetches the whole window; later refreshes start at the last stored date, let a refetched day
+    replace the stored one and skip the request when the window is covered. Files are only rewritten on changes.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = PriceStore(directory, cache=FrameCache())
+        saves = []
+        save = store.save
+        store.save = lambda *args: (saves.append(args[3]), save(*args))
+        api, transport = make_api({
+            "companies/prices/compact": [
+                prices(("2024-01-02", 10.0), ("2024-01-03", 11.0), ("2024-01-04", 12.0)),
+                prices(("2024-01-04", 12.5), ("2024-01-05", 13.0)),  # Jan 4 corrected
+                [],
+                prices(("2024-01-05", 13.0)),  # Only the stored last day, unchanged
+            ],
+        }, price_store=store)
+
+        first = api.get_share_prices_incremental("AAPL", "2024-01-01", "2024-01-05")
+        assert first["close"].tolist() == [10.0, 11.0, 12.0]
+        assert transport.params[-1]["start"] == "2024-01-01" and saves == ["2024-01-04"]
+
+        delta = api.get_share_prices_incremental("AAPL", "2024-01-01", "2024-01-08")
+        assert transport.params[-1]["start"] == "2024-01-04"
+        assert delta["close"].tolist() == [10.0, 11.0, 12.5, 13.0]
+        assert saves == ["2024-01-04", "2024-01-05"]
+
+        covered = api.get_share_prices_incremental("AAPL", "2024-01-03", "2024-01-05")
+        assert covered["close"].tolist() == [11.0, 12.5, 13.0]
+        assert transport.calls["companies/prices/compact"] == 2
+
+        for end_date in ("2024-01-09", "2024-01-10"):  # Empty delta, then an unchanged last day
+            unchanged = api.get_share_prices_incremental("AAPL", "2024-01-01", end_date)
+            assert unchanged["close"].tolist() == [10.0, 11.0, 12.5, 13.0]
+        assert transport.calls["companies/prices/compact"] == 4
+        assert saves == ["2024-01-04", "2024-01-05"]
+
+
+if __name__ == "__main__":
+    test_truncated_bodies_are_retried()
+    test_transport_failures_raise_simfin_api_error()
+    test_fetch_bundle_fails_fast()
+    test_fetch_bundle_time_budget()
+    test_statements_dated_by_publish_date()
+    test_companies_without_ticker_are_requested_again()
+    test_incremental_prices()
+    print("✅ SimFin client checks passed")
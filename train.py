@@ -0,0 +1,163 @@
+import argparse
+import itertools
+import json
+import os
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from joblib import Parallel, delayed
+from features import FEATURE_COLUMNS
+from tree_predictor import TreePredictor
+
+TARGET_COLUMN = "next_day_direction"
+
+# Search space of the original GridSearchCV, widened with row/column subsampling
+PARAM_SPACE = {
+    "max_depth": [3, 5, 7],
+    "learning_rate": [0.01, 0.1, 0.3],
+    "subsample": [0.8, 1.0],
+    "colsample_bytree": [0.8, 1.0],
+}
+
+
+def load_training_data(csv_file="mag7_processed_final3.csv"):
+    """Loads the processed dataset written by kpi2.ipynb, sorted by date."""
+    if not os.path.exists(csv_file):
+        raise FileNotFoundError(f"Error: {csv_file} not found. Ensure data processing is complete.")
+    data = pd.read_csv(csv_file)
+    data["date"] = pd.to_datetime(data["date"])
+    return data.sort_values(by="date", kind="stable").reset_index(drop=True)
+
+
+def chronological_split(data, valid_fraction=0.2):
+    """Splits the data by date: the most recent valid_fraction of dates is the validation fold."""
+    cutoff = data["date"].quantile(1 - valid_fraction)
+    return data[data["date"] <= cutoff], data[data["date"] > cutoff]
+
+
+def sample_candidates(n_candidates, seed=42):
+    """Draws up to n_candidates distinct parameter sets from PARAM_SPACE."""
+    grid = [dict(zip(PARAM_SPACE, values)) for values in itertools.product(*PARAM_SPACE.values())]
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(grid), size=min(n_candidates, len(grid)), replace=False)
+    return [grid[i] for i in picks]
+
+
+def base_params(y_train):
+    """Returns the fixed booster parameters (hist trees, logistic loss, class balance)."""
+    positives = float(np.sum(y_train))
+    negatives = float(len(y_train) - positives)
+    return {
+        "objective": "binary:logistic",
+        "eval_metric": ["error", "logloss"],  # The last metric drives early stopping
+        "tree_method": "hist",
+        "scale_pos_weight": negatives / positives if positives else 1.0,
+        "nthread": 1,  # Parallelism comes from running candidates side by side
+    }
+
+
+def fit_candidate(params, dtrain, dvalid, num_rounds, early_stopping_rounds=25):
+    """Trains one candidate with early stopping on the validation fold and returns its scores."""
+    history = {}
+    booster = xgb.train(
+        params,
+        dtrain,
+        num_boost_round=num_rounds,
+        evals=[(dvalid, "valid")],
+        early_stopping_rounds=early_stopping_rounds,
+        evals_result=history,
+        verbose_eval=False,
+    )
+    best = booster.best_iteration
+    return {
+        "logloss": history["valid"]["logloss"][best],
+        "accuracy": 1.0 - history["valid"]["error"][best],
+        "best_rounds": best + 1,
+    }
+
+
+def successive_halving(X_train, y_train, X_valid, y_valid, n_candidates=24, min_rounds=50, max_rounds=500,
+                       eta=3, n_jobs=-1, seed=42):
+    """
+    Successive-halving search: every candidate first gets min_rounds boosting rounds, then only the best 1/eta
+    (by validation logloss) move on with eta times more rounds, up to max_rounds. Candidates of a rung are trained
+    in parallel and each one stops early once the validation loss stops improving.
+    Returns (best_params, best_result, history) where history lists every rung's results.
+    """
+    dtrain = xgb.DMatrix(X_train, label=y_train)
+    dvalid = xgb.DMatrix(X_valid, label=y_valid)
+    fixed = base_params(y_train)
+
+    candidates = sample_candidates(n_candidates, seed)
+    num_rounds = min_rounds
+    history = []
+    while True:
+        results = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(fit_candidate)(dict(fixed, **params), dtrain, dvalid, num_rounds) for params in candidates
+        )
+        ranked = sorted(zip(candidates, results), key=lambda pair: pair[1]["logloss"])
+        history.append({"rounds": num_rounds, "results": [dict(params, **result) for params, result in ranked]})
+
+        if len(ranked) == 1 or num_rounds >= max_rounds:
+            return ranked[0][0], ranked[0][1], history
+        candidates = [params for params, _ in ranked[:max(1, len(ranked) // eta)]]
+        num_rounds = min(num_rounds * eta, max_rounds)
+
+
+def saved_params(model_path="mag7_final_model.json"):
+    """
+    Returns (params, num_rounds) a saved model was trained with, as recorded by train_model in the model's
+    attributes. Models saved before that only give what their trees show: max_depth and the number of rounds.
+    """
+    with open(model_path) as f:
+        attributes = json.load(f)["learner"].get("attributes", {})
+    if "train_params" in attributes:
+        return json.loads(attributes["train_params"]), int(attributes["best_rounds"])
+    predictor = TreePredictor.from_json(model_path)
+    return {"max_depth": predictor.max_depth}, len(predictor.roots)
+
+
+def train_model(csv_file="mag7_processed_final3.csv", output="mag7_final_model.json", n_candidates=24,
+                max_rounds=500, n_jobs=-1, seed=42):
+    """
+    Full training run: chronological split, parallel successive-halving search with early stopping, then a final
+    hist booster refit on all rows with the selected parameters and number of rounds, saved as JSON.
+    Returns (booster, report).
+    """
+    data = load_training_data(csv_file)
+    train_df, valid_df = chronological_split(data)
+    best_params, best_result, history = successive_halving(
+        train_df[FEATURE_COLUMNS], train_df[TARGET_COLUMN],
+        valid_df[FEATURE_COLUMNS], valid_df[TARGET_COLUMN],
+        n_candidates=n_candidates, max_rounds=max_rounds, n_jobs=n_jobs, seed=seed,
+    )
+    print("Best parameters:", best_params)
+    print(f"Validation accuracy: {best_result['accuracy']:.4f} after {best_result['best_rounds']} rounds")
+
+    final_params = dict(base_params(data[TARGET_COLUMN]), **best_params)
+    final_params["nthread"] = os.cpu_count() or 1
+    booster = xgb.train(
+        final_params,
+        xgb.DMatrix(data[FEATURE_COLUMNS], label=data[TARGET_COLUMN]),
+        num_boost_round=best_result["best_rounds"],
+    )
+    # Stored in the model file so later retraining (e.g. the walk-forward backtest) can reuse the same settings
+    booster.set_attr(train_params=json.dumps(best_params), best_rounds=str(best_result["best_rounds"]))
+    booster.save_model(output)
+    print(f"Model saved in JSON format to {output}.")
+    return booster, {"best_params": best_params, "validation": best_result, "history": history}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the Mag 7 XGBoost model.")
+    parser.add_argument("--data", default="mag7_processed_final3.csv", help="Processed dataset written by kpi2.ipynb")
+    parser.add_argument("--output", default="mag7_final_model.json", help="Where to save the trained model")
+    parser.add_argument("--candidates", type=int, default=24, help="Number of parameter sets to start the search with")
+    parser.add_argument("--max-rounds", type=int, default=500, help="Maximum boosting rounds per candidate")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel workers (-1 uses every core)")
+    args = parser.parse_args()
+    train_model(args.data, args.output, args.candidates, args.max_rounds, args.jobs)
+
+
+if __name__ == "__main__":
+    main()